@@ -0,0 +1,182 @@
+import os
+import threading
+from typing import Dict, Iterable, Optional, Tuple
+from utils.metrics import timed
+from utils.ttl_cache import MISSING, TTLCache
+
+# 💾 Room participant lists and user FCM tokens, cached per process.
+# Entries expire after the TTL; with CHAT_CACHE_LISTEN=1 cached documents
+# also get a Firestore listener that keeps them current (and the TTL no
+# longer applies while the listener is attached). Every listener is its own
+# Watch stream, so at most CHAT_CACHE_MAX_LISTENERS are attached; further
+# entries fall back to the TTL.
+CHAT_ROOM_CACHE_SIZE = int(os.getenv("CHAT_ROOM_CACHE_SIZE", "5000"))
+CHAT_ROOM_CACHE_TTL = float(os.getenv("CHAT_ROOM_CACHE_TTL", "600"))
+CHAT_TOKEN_CACHE_SIZE = int(os.getenv("CHAT_TOKEN_CACHE_SIZE", "50000"))
+CHAT_TOKEN_CACHE_TTL = float(os.getenv("CHAT_TOKEN_CACHE_TTL", "300"))
+CHAT_CACHE_LISTEN = os.getenv("CHAT_CACHE_LISTEN", "0") == "1"
+CHAT_CACHE_MAX_LISTENERS = int(os.getenv("CHAT_CACHE_MAX_LISTENERS", "200"))
+
+
+class ChatDirectory:
+    """
+    Read-through cache of chat_rooms/{id} (participants, name) and
+    users/{uid}.fcm_token used by chat fan-out.
+
+    Rooms are written by clients, so changes are picked up by the TTL or,
+    with listeners enabled, by the document listener. Token removals made
+    by this process (pruning) go through update_token.
+    """
+
+    def __init__(
+        self,
+        db=None,
+        listen: bool = CHAT_CACHE_LISTEN,
+        max_listeners: int = CHAT_CACHE_MAX_LISTENERS,
+        room_size: int = CHAT_ROOM_CACHE_SIZE,
+        room_ttl: float = CHAT_ROOM_CACHE_TTL,
+        token_size: int = CHAT_TOKEN_CACHE_SIZE,
+        token_ttl: float = CHAT_TOKEN_CACHE_TTL,
+    ):
+        self._db = db
+        self.listen = listen
+        self.max_listeners = max_listeners
+        self._watches: Dict[Tuple[str, str], object] = {}
+        self._watch_lock = threading.Lock()
+        self.rooms = TTLCache("chat_rooms", room_size, room_ttl, on_evict=lambda key: self._unwatch("chat_rooms", key))
+        self.tokens = TTLCache("fcm_tokens", token_size, token_ttl, on_evict=lambda key: self._unwatch("users", key))
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.firebase import get_db
+            self._db = get_db()
+        return self._db
+
+    # 🏠 Rooms
+    @staticmethod
+    def _room_value(data: Optional[Dict]) -> Optional[Dict]:
+        if data is None:
+            return None
+        return {"participants": list(data.get("participants", [])), "name": data.get("name")}
+
+    def peek_room(self, room_id: str) -> Tuple[bool, Optional[Dict]]:
+        """
+        (cached, room) without touching Firestore; room is
+        {"participants", "name"}, or None if it doesn't exist.
+        """
+        value = self.rooms.get(room_id)
+        return (False, None) if value is MISSING else (True, value)
+
+    def load_room(self, room_id: str) -> Optional[Dict]:
+        ref = self.db.collection("chat_rooms").document(room_id)
+        with timed("firestore.get", "chat_rooms"):
+            snap = ref.get()
+        value = self._room_value(snap.to_dict() if snap.exists else None)
+        # Missing rooms aren't cached: a client may create the room right after.
+        if value is not None:
+            self.rooms.set(room_id, value, pinned=self._watch("chat_rooms", room_id, ref))
+        return value
+
+    # 📱 Tokens
+    def get_tokens(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """
+        FCM tokens of the given users; cache misses are fetched with a single
+        multi-document get. Users without a token are left out.
+        """
+        tokens: Dict[str, str] = {}
+        missing = []
+        for uid in dict.fromkeys(user_ids):
+            value = self.tokens.get(uid)
+            if value is MISSING:
+                missing.append(uid)
+            elif value:
+                tokens[uid] = value
+        if not missing:
+            return tokens
+
+        refs = [self.db.collection("users").document(uid) for uid in missing]
+        with timed("firestore.get_all", "users"):
+            snaps = list(self.db.get_all(refs))
+        found = {}
+        for snap in snaps:
+            found[snap.id] = (snap.to_dict() or {}).get("fcm_token") if snap.exists else None
+        for uid, ref in zip(missing, refs):
+            token = found.get(uid)
+            # Users without a token are cached too, so they aren't re-read per message.
+            self.tokens.set(uid, token, pinned=self._watch("users", uid, ref))
+            if token:
+                tokens[uid] = token
+        return tokens
+
+    def update_token(self, uid: str, token: Optional[str]):
+        """
+        Write-through hook for users/{uid}.fcm_token written by this process.
+        """
+        if not self.tokens.update(uid, token):
+            self.tokens.set(uid, token)
+
+    # 👂 Listeners
+    def _watch(self, collection: str, doc_id: str, ref) -> bool:
+        if not self.listen:
+            return False
+        key = (collection, doc_id)
+        with self._watch_lock:
+            if key in self._watches:
+                return True
+            if len(self._watches) >= self.max_listeners:
+                return False
+            # Reserve the slot so concurrent loads can't overshoot the cap.
+            self._watches[key] = None
+        cache = self.rooms if collection == "chat_rooms" else self.tokens
+
+        def on_snapshot(snapshots, changes, read_time):
+            for snap in snapshots:
+                data = snap.to_dict() if snap.exists else None
+                if collection == "chat_rooms":
+                    cache.update(doc_id, self._room_value(data))
+                else:
+                    cache.update(doc_id, (data or {}).get("fcm_token"))
+
+        try:
+            watch = ref.on_snapshot(on_snapshot)
+        except Exception as e:
+            print(f"⚠️ Could not listen to {collection}/{doc_id}:", e)
+            with self._watch_lock:
+                self._watches.pop(key, None)
+            return False
+        with self._watch_lock:
+            if key in self._watches:
+                self._watches[key] = watch
+                return True
+        # Evicted while subscribing.
+        watch.unsubscribe()
+        return False
+
+    def _unwatch(self, collection: str, doc_id: str):
+        with self._watch_lock:
+            watch = self._watches.pop((collection, doc_id), None)
+        if watch is not None:
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+
+    def close(self):
+        with self._watch_lock:
+            watches, self._watches = list(self._watches.values()), {}
+        for watch in filter(None, watches):
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+
+    def stats(self) -> Dict:
+        return {
+            "rooms": self.rooms.stats(),
+            "tokens": self.tokens.stats(),
+            "listeners": len(self._watches),
+        }
+
+
+chat_directory = ChatDirectory()
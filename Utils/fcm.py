@@ -1,4 +1,81 @@
-from firebase_admin import messaging
+from typing import Dict, Iterable, List, Optional
+from firebase_admin import firestore, messaging
+from utils.metrics import timed
+from utils.firebase import get_app, get_db
+from utils.chat_cache import chat_directory
+
+# FCM accepts at most 500 tokens per multicast request.
+MULTICAST_CHUNK_SIZE = 500
+# ...and at most 1000 tokens per topic (un)subscribe request.
+TOPIC_CHUNK_SIZE = 1000
+# Firestore "in" filters accept at most 30 values.
+PRUNE_CHUNK_SIZE = 30
+
+# 📣 Content topics clients subscribe to
+TOPICS = ("news", "jobs", "internships")
+
+# Topic-management errors meaning the token will never work again.
+DEAD_TOKEN_REASONS = {"NOT_FOUND", "INVALID_ARGUMENT", "registration-token-not-registered"}
+
+
+def collapse_options(collapse_key: Optional[str]) -> Dict:
+    """
+    Android/APNs settings that make a newer push with the same key replace
+    an older one on the device instead of stacking.
+    """
+    if not collapse_key:
+        return {}
+    return {
+        "android": messaging.AndroidConfig(
+            collapse_key=collapse_key,
+            notification=messaging.AndroidNotification(tag=collapse_key),
+        ),
+        "apns": messaging.APNSConfig(headers={"apns-collapse-id": collapse_key}),
+    }
+
+
+def is_unregistered(error: Optional[BaseException]) -> bool:
+    """
+    True when FCM says a token is no longer registered to any app instance.
+    """
+    if error is None:
+        return False
+    if isinstance(error, messaging.UnregisteredError):
+        return True
+    text = str(error)
+    return "not registered" in text.lower() or "Requested entity was not found" in text
+
+
+def prune_fcm_tokens(tokens: Iterable[str]) -> int:
+    """
+    Removes unregistered tokens from users/{uid}.fcm_token so later fan-outs
+    don't pay for them. Returns the number of users updated.
+    """
+    tokens = list(dict.fromkeys(t for t in tokens if t))
+    if not tokens:
+        return 0
+    db = get_db()
+    pruned = 0
+    try:
+        for start in range(0, len(tokens), PRUNE_CHUNK_SIZE):
+            chunk = tokens[start:start + PRUNE_CHUNK_SIZE]
+            with timed("firestore.query", "users"):
+                snaps = list(db.collection("users").where("fcm_token", "in", chunk).stream())
+            if not snaps:
+                continue
+            batch = db.batch()
+            for snap in snaps:
+                batch.update(snap.reference, {"fcm_token": firestore.DELETE_FIELD})
+            with timed("firestore.batch_write", "users"):
+                batch.commit()
+            for snap in snaps:
+                chat_directory.update_token(snap.id, None)
+            pruned += len(snaps)
+    except Exception as e:
+        print("❌ Token pruning failed:", e)
+    if pruned:
+        print(f"🧹 Pruned {pruned} unregistered FCM tokens")
+    return pruned
 
 def send_fcm_notification(token: str, title: str, body: str):
     message = messaging.Message(
@@ -8,8 +85,140 @@ def send_fcm_notification(token: str, title: str, body: str):
         ),
         token=token,
     )
-    try:
-        response = messaging.send(message)
-        print("✅ Chat Notification sent:", response)
-    except Exception as e:
-        print("❌ Chat Notification error:", e)
+    with timed("fcm.send", "chat") as t:
+        try:
+            response = messaging.send(message, app=get_app())
+            print("✅ Chat Notification sent:", response)
+        except Exception as e:
+            t.error()
+            print("❌ Chat Notification error:", e)
+
+def _send_each_for_multicast(message: messaging.MulticastMessage):
+    # send_each_for_multicast replaced send_multicast in firebase-admin 6.x
+    if hasattr(messaging, "send_each_for_multicast"):
+        return messaging.send_each_for_multicast(message, app=get_app())
+    return messaging.send_multicast(message, app=get_app())
+
+def send_fcm_multicast(
+    tokens: List[str],
+    title: str,
+    body: str,
+    data: Optional[Dict[str, str]] = None,
+    collapse_key: Optional[str] = None,
+) -> Dict:
+    """
+    Sends one notification to many devices in chunks of up to 500 tokens.
+
+    With a collapse_key, a newer notification replaces an undelivered or
+    still-displayed one with the same key instead of stacking on the device.
+
+    Returns:
+        dict: {"success": int, "failure": int, "results": [{"token", "ok", "message_id", "error"}]}
+    """
+    tokens = list(dict.fromkeys(t for t in tokens if t))
+    results = []
+
+    for start in range(0, len(tokens), MULTICAST_CHUNK_SIZE):
+        chunk = tokens[start:start + MULTICAST_CHUNK_SIZE]
+        message = messaging.MulticastMessage(
+            notification=messaging.Notification(
+                title=title,
+                body=body,
+            ),
+            data=data,
+            tokens=chunk,
+            **collapse_options(collapse_key),
+        )
+        try:
+            with timed("fcm.multicast", "chat") as t:
+                batch = _send_each_for_multicast(message)
+                if batch.failure_count:
+                    t.error()
+            for token, resp in zip(chunk, batch.responses):
+                results.append({
+                    "token": token,
+                    "ok": resp.success,
+                    "message_id": resp.message_id,
+                    "error": str(resp.exception) if resp.exception else None,
+                    "unregistered": is_unregistered(resp.exception),
+                })
+        except Exception as e:
+            print("❌ Multicast chunk error:", e)
+            for token in chunk:
+                results.append({"token": token, "ok": False, "message_id": None, "error": str(e)})
+
+    success = sum(1 for r in results if r["ok"])
+    print(f"✅ Multicast sent: {success} ok, {len(results) - success} failed")
+    prune_fcm_tokens(r["token"] for r in results if r.pop("unregistered", False))
+    return {"success": success, "failure": len(results) - success, "results": results}
+
+def send_topic_notification(
+    topic: str,
+    title: str,
+    body: str,
+    data: Optional[Dict[str, str]] = None,
+    collapse_key: Optional[str] = None,
+) -> Optional[str]:
+    """
+    Sends one notification to every device subscribed to `topic`.
+
+    Returns:
+        str: FCM message ID, or None if the send failed
+    """
+    message = messaging.Message(
+        notification=messaging.Notification(
+            title=title,
+            body=body,
+        ),
+        data=data,
+        topic=topic,
+        **collapse_options(collapse_key),
+    )
+    with timed("fcm.topic", topic) as t:
+        try:
+            response = messaging.send(message, app=get_app())
+            print(f"✅ Topic notification sent to '{topic}':", response)
+            return response
+        except Exception as e:
+            t.error()
+            print(f"❌ Topic notification to '{topic}' failed:", e)
+    return None
+
+def _manage_topic(tokens: List[str], topic: str, subscribe: bool) -> Dict:
+    tokens = list(dict.fromkeys(t for t in tokens if t))
+    call = messaging.subscribe_to_topic if subscribe else messaging.unsubscribe_from_topic
+    success, errors, dead = 0, [], []
+
+    for start in range(0, len(tokens), TOPIC_CHUNK_SIZE):
+        chunk = tokens[start:start + TOPIC_CHUNK_SIZE]
+        try:
+            with timed("fcm.subscribe" if subscribe else "fcm.unsubscribe", topic) as t:
+                response = call(chunk, topic, app=get_app())
+                if response.failure_count:
+                    t.error()
+            success += response.success_count
+            for error in response.errors:
+                errors.append({"token": chunk[error.index], "reason": error.reason})
+                if error.reason in DEAD_TOKEN_REASONS:
+                    dead.append(chunk[error.index])
+        except Exception as e:
+            print(f"❌ Topic {'subscribe' if subscribe else 'unsubscribe'} chunk error:", e)
+            errors.extend({"token": token, "reason": str(e)} for token in chunk)
+
+    prune_fcm_tokens(dead)
+    return {"success": success, "failure": len(errors), "errors": errors}
+
+def subscribe_tokens(tokens: List[str], topic: str) -> Dict:
+    """
+    Subscribes many devices to a topic, up to 1000 tokens per FCM call.
+
+    Returns:
+        dict: {"success": int, "failure": int, "errors": [{"token", "reason"}]}
+    """
+    return _manage_topic(tokens, topic, subscribe=True)
+
+def unsubscribe_tokens(tokens: List[str], topic: str) -> Dict:
+    """
+    Unsubscribes many devices from a topic; same result shape as subscribe_tokens.
+    """
+    return _manage_topic(tokens, topic, subscribe=False)
@@ -1,19 +1,81 @@
+import os
+import threading
+from typing import Optional
 import firebase_admin
-from firebase_admin import credentials, messaging
+from firebase_admin import credentials, firestore, messaging
+from utils.metrics import timed
 
-cred = credentials.Certificate("serviceAccountKey.json")
-firebase_admin.initialize_app(cred)
+# 🔐 One Firebase app and one Firestore client per process, created on first
+# use instead of at import time. Tests and benchmarks inject their own with
+# set_app() / set_db().
+SERVICE_ACCOUNT_PATH = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "serviceAccountKey.json")
+
+_app = None
+_db = None
+_lock = threading.RLock()
+
+
+def get_app():
+    global _app
+    if _app is None:
+        with _lock:
+            if _app is None:
+                try:
+                    _app = firebase_admin.get_app()
+                except ValueError:
+                    cred = credentials.Certificate(SERVICE_ACCOUNT_PATH)
+                    _app = firebase_admin.initialize_app(cred)
+    return _app
+
+
+def get_db():
+    global _db
+    if _db is None:
+        with _lock:
+            if _db is None:
+                _db = firestore.client(app=get_app())
+    return _db
+
+
+def set_app(app):
+    global _app
+    with _lock:
+        _app = app
+
+
+def set_db(db):
+    global _db
+    with _lock:
+        _db = db
+
+
+def reset():
+    """
+    Forgets injected or cached clients (the Firebase app itself stays registered).
+    """
+    global _app, _db
+    with _lock:
+        _app = None
+        _db = None
+
+
+def send_push_notification(token: str, title: str, body: str, collapse_key: Optional[str] = None):
+    from utils.fcm import collapse_options, is_unregistered, prune_fcm_tokens
 
-def send_push_notification(token: str, title: str, body: str):
     message = messaging.Message(
         notification=messaging.Notification(
             title=title,
             body=body,
         ),
         token=token,
+        **collapse_options(collapse_key),
     )
-    try:
-        response = messaging.send(message)
-        print("✅ Notification sent:", response)
-    except Exception as e:
-        print("❌ Error sending notification:", e)
+    with timed("fcm.send", "content") as t:
+        try:
+            response = messaging.send(message, app=get_app())
+            print("✅ Notification sent:", response)
+        except Exception as e:
+            t.error()
+            print("❌ Error sending notification:", e)
+            if is_unregistered(e):
+                prune_fcm_tokens([token])
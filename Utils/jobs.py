@@ -0,0 +1,164 @@
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+ACTIVE = ("queued", "running")
+
+
+class RefreshJob:
+    """
+    One refresh run over a set of categories, with per-category progress:
+    fetched, parsed, deduplicated (new after dedup), written and notified.
+    Forced jobs bypass the Perplexity response cache.
+    """
+
+    def __init__(self, categories: Iterable[str], token: Optional[str] = None, force: bool = False):
+        self.id = uuid.uuid4().hex
+        self.categories = list(categories)
+        self.force = force
+        self.tokens = {token} if token else set()
+        self.status = "queued"
+        self.created_at = datetime.now(timezone.utc)
+        self.started_at = None
+        self.finished_at = None
+        self.result = None
+        self.error = None
+        self.progress: Dict[str, Dict] = {
+            c: {"state": "pending", "fetched": False, "parsed": 0, "deduplicated": 0, "written": 0, "notified": 0}
+            for c in self.categories
+        }
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+
+    def update(self, category: str, **fields):
+        with self._lock:
+            self.progress.setdefault(category, {}).update(fields)
+
+    def add_token(self, token: Optional[str]):
+        if token:
+            with self._lock:
+                self.tokens.add(token)
+
+    def notify_tokens(self) -> List[str]:
+        with self._lock:
+            return list(self.tokens)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._done.wait(timeout)
+
+    def to_dict(self) -> Dict:
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "categories": list(self.categories),
+                "force": self.force,
+                "created_at": self.created_at.isoformat(),
+                "started_at": self.started_at.isoformat() if self.started_at else None,
+                "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+                "progress": {c: dict(p) for c, p in self.progress.items()},
+                "result": self.result,
+                "error": self.error,
+            }
+
+
+class NullJob:
+    """
+    Progress sink used when a refresh runs outside the job runner.
+    """
+
+    def __init__(self, token: Optional[str] = None):
+        self._tokens = [token] if token else []
+
+    def update(self, category: str, **fields):
+        pass
+
+    def notify_tokens(self) -> List[str]:
+        return self._tokens
+
+
+class JobRunner:
+    """
+    Runs refresh jobs in the background and de-duplicates concurrent requests:
+    categories already covered by a queued/running job are attached to that
+    job instead of being refreshed again.
+    """
+
+    def __init__(self, work: Callable[[RefreshJob], Dict], max_workers: int = 2, history: int = 100):
+        self.work = work
+        self.history = history
+        self._jobs: "OrderedDict[str, RefreshJob]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="refresh")
+
+    def submit(self, categories: Iterable[str], token: Optional[str] = None, force: bool = False) -> Tuple[Optional[RefreshJob], List[RefreshJob]]:
+        """
+        Returns (new_job, attached_jobs). new_job is None when every requested
+        category is already being refreshed. A forced request only attaches
+        to forced jobs; its other categories get a job of their own.
+        """
+        categories = list(dict.fromkeys(categories))
+        with self._lock:
+            attached = []
+            covered = set()
+            for job in self._jobs.values():
+                if job.status not in ACTIVE or (force and not job.force):
+                    continue
+                overlap = (set(job.categories) & set(categories)) - covered
+                if overlap:
+                    job.add_token(token)
+                    attached.append(job)
+                    covered |= overlap
+            remaining = [c for c in categories if c not in covered]
+            job = None
+            if remaining:
+                job = RefreshJob(remaining, token, force)
+                self._jobs[job.id] = job
+                while len(self._jobs) > self.history:
+                    oldest = next(iter(self._jobs.values()))
+                    if oldest.status in ACTIVE:
+                        break
+                    self._jobs.popitem(last=False)
+        if job is not None:
+            self._executor.submit(self._run, job)
+        return job, attached
+
+    def run(self, categories: Iterable[str], token: Optional[str] = None, timeout: Optional[float] = None, force: bool = False):
+        """
+        Submits and blocks until this request's categories are refreshed.
+        """
+        job, attached = self.submit(categories, token, force)
+        for j in ([job] if job else []) + attached:
+            j.wait(timeout)
+        return job, attached
+
+    def get(self, job_id: str) -> Optional[RefreshJob]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> List[RefreshJob]:
+        with self._lock:
+            return [j for j in self._jobs.values() if j.status in ACTIVE]
+
+    def _run(self, job: RefreshJob):
+        with job._lock:
+            job.status = "running"
+            job.started_at = datetime.now(timezone.utc)
+        try:
+            result = self.work(job)
+            status, error = "succeeded", None
+        except Exception as e:
+            print(f"❌ Refresh job {job.id} failed:", e)
+            result, status, error = None, "failed", str(e)
+        with job._lock:
+            job.result = result
+            job.status = status
+            job.error = error
+            job.finished_at = datetime.now(timezone.utc)
+        job._done.set()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,59 @@
+import re
+from collections import Counter
+from typing import List, Optional
+
+# Keywords stored per document (title/summary/company/location terms).
+MAX_KEYWORDS = 24
+
+# Keeps tech names such as "c++", "c#", "node.js" and ".net" in one piece.
+_token = re.compile(r"[a-z0-9][a-z0-9+#]*(?:[.\-][a-z0-9+#]+)*|\.net\b")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be been before being below between both but by
+can could did do does doing down during each few for from further get gets got had has have having he her
+here hers him his how i if in into is it its itself just latest like may me more most my new no nor not now
+of off on once only or other our out over own per same she should so some such than that the their them
+then there these they this those through to too under until up us very via was we were what when where
+which while who whom why will with within without would you your yours
+apply application click details here http https link links www com
+""".split())
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Lower-cased search terms of a text, stopwords removed, in order.
+    """
+    if not text:
+        return []
+    terms = []
+    for token in _token.findall(str(text).casefold()):
+        token = token.rstrip(".-")
+        if len(token) < 2 and not token.isdigit():
+            continue
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+    return terms
+
+
+def extract_keywords(title: str = "", *texts: Optional[str], limit: int = MAX_KEYWORDS) -> List[str]:
+    """
+    Picks the terms a document should be found by: every title term first,
+    then the most frequent terms of the remaining fields.
+
+    Args:
+        title (str): Document title
+        texts (str): Other searchable fields (summary, company, location, ...)
+        limit (int): Maximum number of keywords
+
+    Returns:
+        list: Unique keywords, most relevant first
+    """
+    keywords = list(dict.fromkeys(tokenize(title)))
+    counts = Counter(term for text in texts for term in tokenize(text))
+    seen = set(keywords)
+    for term, _ in counts.most_common():
+        if term not in seen:
+            keywords.append(term)
+            seen.add(term)
+    return keywords[:limit]
@@ -0,0 +1,278 @@
+import os
+import socket
+import ipaddress
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from firestore.dedup import normalize_url
+from utils.ttl_cache import MISSING, TTLCache
+from utils.metrics import timed
+
+# 🔗 Links from the LLM are checked before upload (LINK_VALIDATION=0 to skip).
+# Only links that are definitely dead (404/410, unknown host, refused
+# connection, non-HTTP scheme) are dropped; sites that block bots, rate-limit
+# or time out are given the benefit of the doubt.
+LINK_VALIDATION = os.getenv("LINK_VALIDATION", "1") == "1"
+LINK_CONNECT_TIMEOUT = float(os.getenv("LINK_CONNECT_TIMEOUT", "2"))
+LINK_READ_TIMEOUT = float(os.getenv("LINK_READ_TIMEOUT", "4"))
+LINK_MAX_CONCURRENCY = int(os.getenv("LINK_MAX_CONCURRENCY", "16"))
+LINK_PER_HOST = int(os.getenv("LINK_PER_HOST", "2"))
+LINK_MAX_REDIRECTS = int(os.getenv("LINK_MAX_REDIRECTS", "5"))
+# Results are cached by normalized URL; dead links are re-checked sooner.
+LINK_CACHE_SIZE = int(os.getenv("LINK_CACHE_SIZE", "20000"))
+LINK_CACHE_TTL = float(os.getenv("LINK_CACHE_TTL", str(6 * 3600)))
+LINK_DEAD_TTL = float(os.getenv("LINK_DEAD_TTL", "1800"))
+
+DEAD_STATUS = {404, 410}
+# Statuses after which a HEAD is retried as a GET (HEAD unsupported or refused).
+HEAD_FALLBACK_STATUS = {400, 403, 405, 501}
+USER_AGENT = "Mozilla/5.0 (compatible; AskargLinkCheck/1.0)"
+
+
+def _is_private_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    return ip.is_private or ip.is_loopback or ip.is_link_local or ip.is_reserved or ip.is_multicast
+
+
+class UnsafeLink(Exception):
+    """
+    A link (or one of its redirects) that must not be fetched: not http(s),
+    or pointing at a private, loopback or otherwise internal address.
+    """
+
+
+class LinkValidator:
+    """
+    Checks many links concurrently over one pooled session.
+
+    Each link gets a HEAD (falling back to GET when the server refuses HEAD),
+    following redirects; at most `per_host` requests run against one host at
+    a time. Results are {"ok", "dead", "status", "final_url", "error"} and are
+    cached by normalized URL.
+
+    Redirects are followed by hand and every hop's host is resolved first;
+    links or redirects to private, loopback or link-local addresses are
+    rejected unless `allow_private=True` (for tests against a local stub).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LINK_MAX_CONCURRENCY,
+        per_host: int = LINK_PER_HOST,
+        connect_timeout: float = LINK_CONNECT_TIMEOUT,
+        read_timeout: float = LINK_READ_TIMEOUT,
+        cache_size: int = LINK_CACHE_SIZE,
+        cache_ttl: float = LINK_CACHE_TTL,
+        dead_ttl: float = LINK_DEAD_TTL,
+        allow_private: bool = False,
+    ):
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_host = max(1, per_host)
+        self.timeout = (connect_timeout, read_timeout)
+        self.dead_ttl = dead_ttl
+        self.allow_private = allow_private
+        self.cache = TTLCache("links", cache_size, cache_ttl)
+        # host -> whether every address it resolves to is public
+        self._resolved = TTLCache("link_hosts", cache_size, cache_ttl)
+        self._hosts: Dict[str, threading.BoundedSemaphore] = {}
+        self._hosts_lock = threading.Lock()
+        self._session: Optional[requests.Session] = None
+        self._session_lock = threading.Lock()
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    session = requests.Session()
+                    session.headers["User-Agent"] = USER_AGENT
+                    adapter = HTTPAdapter(pool_connections=self.max_concurrency, pool_maxsize=self.per_host)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    self._session = session
+        return self._session
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._hosts_lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = threading.BoundedSemaphore(self.per_host)
+            return slot
+
+    @staticmethod
+    def _result(ok: bool, dead: bool, status: Optional[int], final_url: str, error: Optional[str] = None) -> Dict:
+        return {"ok": ok, "dead": dead, "status": status, "final_url": final_url, "error": error}
+
+    def _check_target(self, url: str) -> str:
+        """
+        Returns the URL's host, or raises UnsafeLink. Host names are resolved
+        and every address they map to must be public.
+        """
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        if parts.scheme not in ("http", "https") or not host:
+            raise UnsafeLink("not an http(s) link")
+        if self.allow_private:
+            return host
+        if host in ("localhost", "localhost.localdomain") or host.endswith((".localhost", ".local", ".internal")):
+            raise UnsafeLink("private host")
+        safe = self._resolved.get(host)
+        if safe is MISSING:
+            try:
+                infos = socket.getaddrinfo(host, parts.port or (443 if parts.scheme == "https" else 80),
+                                           proto=socket.IPPROTO_TCP)
+            except socket.gaierror:
+                # Unknown host: a dead link, not an unsafe one.
+                raise requests.exceptions.ConnectionError(f"cannot resolve {host}")
+            safe = not any(_is_private_address(info[4][0]) for info in infos)
+            self._resolved.set(host, safe)
+        if not safe:
+            raise UnsafeLink("private host")
+        return host
+
+    def _follow(self, method: str, url: str) -> requests.Response:
+        """
+        Sends `method` and follows redirects by hand, checking every hop's
+        target before connecting to it. Returns the last (closed) response;
+        its .url is the final URL.
+        """
+        for _ in range(LINK_MAX_REDIRECTS + 1):
+            host = self._check_target(url)
+            with self._host_slot(host):
+                response = self.session.request(method, url, timeout=self.timeout, allow_redirects=False, stream=True)
+                response.close()
+            location = response.headers.get("Location")
+            if not response.is_redirect or not location:
+                return response
+            url = urljoin(response.url or url, location)
+        raise requests.exceptions.TooManyRedirects(f"more than {LINK_MAX_REDIRECTS} redirects")
+
+    def _probe(self, url: str) -> Dict:
+        with timed("links.check") as t:
+            try:
+                response = self._follow("HEAD", url)
+                if response.status_code in HEAD_FALLBACK_STATUS or response.status_code in DEAD_STATUS:
+                    response = self._follow("GET", url)
+            except UnsafeLink as e:
+                t.error()
+                return self._result(False, True, None, url, str(e))
+            except requests.exceptions.Timeout as e:
+                # Slow hosts aren't proof of a dead link; keep it.
+                t.error()
+                return self._result(False, False, None, url, type(e).__name__)
+            except (requests.exceptions.ConnectionError, requests.exceptions.InvalidURL,
+                    requests.exceptions.TooManyRedirects) as e:
+                # Unknown host, refused connection, redirect loop.
+                t.error()
+                return self._result(False, True, None, url, type(e).__name__)
+            except requests.exceptions.RequestException as e:
+                t.error()
+                return self._result(False, False, None, url, type(e).__name__)
+
+        status = response.status_code
+        final_url = response.url or url
+        if status < 400:
+            return self._result(True, False, status, final_url)
+        return self._result(False, status in DEAD_STATUS, status, final_url)
+
+    def check(self, url: str) -> Dict:
+        """
+        Validates one link, from the cache when possible.
+        """
+        key = normalize_url(url)
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            return cached
+        result = self._probe(url.strip())
+        self.cache.set(key, result, ttl=self.dead_ttl if not result["ok"] else None)
+        return result
+
+    def check_many(self, urls: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Validates many links concurrently; returns {url: result}.
+        """
+        urls = list(dict.fromkeys(u for u in urls if u))
+        if not urls:
+            return {}
+        workers = min(self.max_concurrency, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="links") as executor:
+            return dict(zip(urls, executor.map(self.check, urls)))
+
+    @staticmethod
+    def _apply(post: Dict[str, str], result: Optional[Dict]) -> Optional[Dict[str, str]]:
+        link = post.get("link", "").strip()
+        if result is None:
+            return post
+        if result["dead"]:
+            print(f"🔗 Dropping dead link ({result['status'] or result['error']}): {link}")
+            return None
+        # Only a link that resolved cleanly is canonicalized; a redirect
+        # to a login wall or error page would break the link and its key.
+        if result["ok"] and result["final_url"] and result["final_url"] != link:
+            post = dict(post, link=result["final_url"])
+        return post
+
+    def validate_posts(self, posts: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+        """
+        Drops posts whose link is dead and rewrites redirected links to their
+        final URL, so dedup sees the canonical link.
+        """
+        posts = list(posts)
+        results = self.check_many(post.get("link", "").strip() for post in posts)
+        valid = (self._apply(post, results.get(post.get("link", "").strip())) for post in posts)
+        return [post for post in valid if post is not None]
+
+    def iter_valid_posts(self, posts: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+        """
+        Lazy validate_posts for streamed posts: each link is checked as soon
+        as its post arrives, and valid posts are yielded in arrival order.
+        Closing the generator early (e.g. once enough unique platforms were
+        seen) stops reading `posts` and cancels the pending checks.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="links")
+        pending: Deque[Tuple[Dict[str, str], Optional[Future]]] = deque()
+
+        def ready():
+            while pending and (pending[0][1] is None or pending[0][1].done()):
+                post, future = pending.popleft()
+                post = self._apply(post, future.result() if future else None)
+                if post is not None:
+                    yield post
+
+        try:
+            for post in posts:
+                link = post.get("link", "").strip()
+                pending.append((post, executor.submit(self.check, link) if link else None))
+                yield from ready()
+            while pending:
+                if pending[0][1] is not None:
+                    pending[0][1].result()
+                yield from ready()
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+link_validator = LinkValidator()
+
+
+def validate_post_links(posts: Iterable[Dict[str, str]]) -> List[Dict[str, str]]:
+    """
+    Pipeline stage between parsing and upload; a no-op when LINK_VALIDATION=0.
+    """
+    if not LINK_VALIDATION:
+        return list(posts)
+    return link_validator.validate_posts(posts)
+
+
+def iter_valid_post_links(posts: Iterable[Dict[str, str]]) -> Iterator[Dict[str, str]]:
+    """
+    Streaming variant of validate_post_links; consumes `posts` lazily.
+    """
+    if not LINK_VALIDATION:
+        return iter(posts)
+    return link_validator.iter_valid_posts(posts)
@@ -0,0 +1,195 @@
+import os
+import time
+import threading
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+
+# Seconds; tuned for external API / RPC latency.
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Key = Tuple[str, str]  # (operation, category)
+
+_lock = threading.Lock()
+_histograms: Dict[Key, List[float]] = {}    # bucket counts + [sum, count]
+_outcomes: Dict[Tuple[str, str, str], int] = {}
+_payload_bytes: Dict[Key, int] = {}
+_cache_events: Dict[Tuple[str, str], int] = {}  # (cache, hit|stale_hit|miss|store|eviction) -> count
+
+# Per-request list of (operation, seconds) used for Server-Timing headers.
+_request_timings: ContextVar[Optional[list]] = ContextVar("request_timings", default=None)
+
+
+def record(operation: str, seconds: float, category: str = "", error: bool = False, payload_bytes: int = 0):
+    key = (operation, category or "")
+    with _lock:
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0, 0]
+        hist[bisect_left(BUCKETS, seconds)] += 1
+        hist[-2] += seconds
+        hist[-1] += 1
+        outcome_key = (operation, key[1], "error" if error else "ok")
+        _outcomes[outcome_key] = _outcomes.get(outcome_key, 0) + 1
+        if payload_bytes:
+            _payload_bytes[key] = _payload_bytes.get(key, 0) + payload_bytes
+
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((operation, seconds))
+
+
+def count_cache(cache: str, outcome: str, n: int = 1):
+    """
+    Counts cache lookups (hit/stale_hit/miss), stores and evictions.
+    """
+    if not METRICS_ENABLED or n <= 0:
+        return
+    with _lock:
+        _cache_events[(cache, outcome)] = _cache_events.get((cache, outcome), 0) + n
+
+
+class _Timer:
+    __slots__ = ("operation", "category", "failed", "size", "start")
+
+    def __init__(self, operation: str, category: str):
+        self.operation = operation
+        self.category = category
+        self.failed = False
+        self.size = 0
+
+    def error(self):
+        self.failed = True
+
+    def payload(self, size: int):
+        self.size += size or 0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(
+            self.operation, time.perf_counter() - self.start, self.category,
+            error=self.failed or (exc_type is not None and not issubclass(exc_type, GeneratorExit)),
+            payload_bytes=self.size,
+        )
+        return False
+
+
+class _NoopTimer:
+    __slots__ = ()
+
+    def error(self):
+        pass
+
+    def payload(self, size: int):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NOOP = _NoopTimer()
+
+
+def timed(operation: str, category: Optional[str] = None):
+    """
+    Context manager timing one external call.
+
+        with timed("firestore.get_all", "news_articles") as t:
+            ...
+            t.payload(len(body))   # optional
+            t.error()              # mark failure without raising
+
+    Returns a shared no-op when METRICS_ENABLED=0.
+    """
+    if not METRICS_ENABLED:
+        return _NOOP
+    return _Timer(operation, category or "")
+
+
+def start_request_timings() -> object:
+    """
+    Begins collecting timings for the current request; returns a reset token.
+    """
+    return _request_timings.set([])
+
+
+def finish_request_timings(token) -> str:
+    """
+    Stops collecting and returns a Server-Timing header value.
+    """
+    timings = _request_timings.get() or []
+    _request_timings.reset(token)
+    totals: Dict[str, List[float]] = {}
+    for operation, seconds in timings:
+        entry = totals.setdefault(operation, [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+    return ", ".join(
+        f'{op.replace(".", "_")};dur={total * 1000:.1f};desc="{count} calls"'
+        for op, (total, count) in totals.items()
+    )
+
+
+def _labels(**labels) -> str:
+    parts = []
+    for name, value in labels.items():
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        parts.append(f'{name}="{value}"')
+    return "{" + ",".join(parts) + "}"
+
+
+def render_prometheus() -> str:
+    """
+    Text exposition format (version 0.0.4).
+    """
+    with _lock:
+        histograms = {k: list(v) for k, v in _histograms.items()}
+        outcomes = dict(_outcomes)
+        payloads = dict(_payload_bytes)
+        cache_events = dict(_cache_events)
+
+    lines = [
+        "# HELP askarg_external_call_seconds Latency of calls to Perplexity, Firestore and FCM.",
+        "# TYPE askarg_external_call_seconds histogram",
+    ]
+    for (operation, category), hist in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(BUCKETS + (float("inf"),), hist[:len(BUCKETS) + 1]):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f"askarg_external_call_seconds_bucket{_labels(operation=operation, category=category, le=le)} {cumulative}")
+        lines.append(f"askarg_external_call_seconds_sum{_labels(operation=operation, category=category)} {hist[-2]}")
+        lines.append(f"askarg_external_call_seconds_count{_labels(operation=operation, category=category)} {hist[-1]}")
+
+    lines.append("# HELP askarg_external_calls_total External calls by outcome.")
+    lines.append("# TYPE askarg_external_calls_total counter")
+    for (operation, category, outcome), count in sorted(outcomes.items()):
+        lines.append(f"askarg_external_calls_total{_labels(operation=operation, category=category, outcome=outcome)} {count}")
+
+    lines.append("# HELP askarg_external_payload_bytes_total Bytes sent or received by external calls.")
+    lines.append("# TYPE askarg_external_payload_bytes_total counter")
+    for (operation, category), size in sorted(payloads.items()):
+        lines.append(f"askarg_external_payload_bytes_total{_labels(operation=operation, category=category)} {size}")
+
+    lines.append("# HELP askarg_cache_events_total Cache hits, stale hits, misses, stores and evictions.")
+    lines.append("# TYPE askarg_cache_events_total counter")
+    for (cache, outcome), count in sorted(cache_events.items()):
+        lines.append(f"askarg_cache_events_total{_labels(cache=cache, outcome=outcome)} {count}")
+
+    return "\n".join(lines) + "\n"
+
+
+def reset():
+    with _lock:
+        _histograms.clear()
+        _outcomes.clear()
+        _payload_bytes.clear()
+        _cache_events.clear()
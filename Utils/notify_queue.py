@@ -0,0 +1,141 @@
+import os
+import time
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# ⏳ Chat pushes are held per (room, recipient) for CHAT_NOTIFY_WINDOW seconds
+# after the latest message, but never longer than CHAT_NOTIFY_MAX_DELAY after
+# the first one. CHAT_NOTIFY_MAX_BATCH messages, or CHAT_NOTIFY_MAX_PENDING
+# queued recipients, flush right away. A window of 0 sends immediately.
+CHAT_NOTIFY_WINDOW = float(os.getenv("CHAT_NOTIFY_WINDOW", "3"))
+CHAT_NOTIFY_MAX_DELAY = float(os.getenv("CHAT_NOTIFY_MAX_DELAY", "10"))
+CHAT_NOTIFY_MAX_BATCH = int(os.getenv("CHAT_NOTIFY_MAX_BATCH", "20"))
+CHAT_NOTIFY_MAX_PENDING = int(os.getenv("CHAT_NOTIFY_MAX_PENDING", "5000"))
+
+
+class PendingNotification:
+    """
+    Messages for one recipient in one room that have not been pushed yet.
+    """
+
+    __slots__ = ("room_id", "room_name", "recipient", "count", "last_text", "first_at", "deadline")
+
+    def __init__(self, room_id: str, room_name: str, recipient: str, text: str, now: float, deadline: float):
+        self.room_id = room_id
+        self.room_name = room_name
+        self.recipient = recipient
+        self.count = 1
+        self.last_text = text
+        self.first_at = now
+        self.deadline = deadline
+
+
+Deliver = Callable[[str, List[PendingNotification]], None]
+
+
+class NotificationQueue:
+    """
+    Debounces chat pushes per (room, recipient) and hands due entries to
+    `deliver(room_id, entries)` from a single background thread, so a burst
+    of N messages costs one push per recipient instead of N.
+
+    Usage:
+        queue = NotificationQueue(deliver)
+        queue.add("room1", ["uid1", "uid2"], "hi", room_name="Study group")
+        queue.close()   # flushes whatever is still pending
+    """
+
+    def __init__(
+        self,
+        deliver: Deliver,
+        window: float = CHAT_NOTIFY_WINDOW,
+        max_delay: float = CHAT_NOTIFY_MAX_DELAY,
+        max_batch: int = CHAT_NOTIFY_MAX_BATCH,
+        max_pending: int = CHAT_NOTIFY_MAX_PENDING,
+    ):
+        self.deliver = deliver
+        self.window = max(0.0, window)
+        self.max_delay = max(self.window, max_delay)
+        self.max_batch = max(1, max_batch)
+        self.max_pending = max(1, max_pending)
+        self._pending: Dict[Tuple[str, str], PendingNotification] = {}
+        self._cond = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def add(self, room_id: str, recipients: Iterable[str], text: str, room_name: Optional[str] = None):
+        """
+        Queues one message for each recipient. Never blocks on delivery.
+        """
+        now = time.monotonic()
+        with self._cond:
+            for recipient in recipients:
+                key = (room_id, recipient)
+                entry = self._pending.get(key)
+                if entry is None:
+                    entry = PendingNotification(room_id, room_name or room_id, recipient, text, now, now + self.window)
+                    self._pending[key] = entry
+                else:
+                    entry.count += 1
+                    entry.last_text = text
+                    entry.deadline = min(entry.first_at + self.max_delay, now + self.window)
+                if entry.count >= self.max_batch:
+                    entry.deadline = now
+            if len(self._pending) >= self.max_pending:
+                for entry in self._pending.values():
+                    entry.deadline = now
+            self._ensure_thread()
+            self._cond.notify()
+
+    def pending(self) -> int:
+        with self._cond:
+            return len(self._pending)
+
+    def _take(self, now: Optional[float] = None) -> List[PendingNotification]:
+        due = [key for key, e in self._pending.items() if now is None or e.deadline <= now]
+        return [self._pending.pop(key) for key in due]
+
+    def _dispatch(self, entries: List[PendingNotification]):
+        by_room: Dict[str, List[PendingNotification]] = {}
+        for entry in entries:
+            by_room.setdefault(entry.room_id, []).append(entry)
+        for room_id, room_entries in by_room.items():
+            try:
+                self.deliver(room_id, room_entries)
+            except Exception as e:
+                print(f"❌ Chat notification flush for room {room_id} failed:", e)
+
+    def flush(self):
+        """
+        Delivers everything pending now, on the calling thread.
+        """
+        with self._cond:
+            entries = self._take()
+        self._dispatch(entries)
+
+    def _ensure_thread(self):
+        if self._thread is None and not self._closed:
+            self._thread = threading.Thread(target=self._run, name="chat-notify", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed:
+                    now = time.monotonic()
+                    if any(e.deadline <= now for e in self._pending.values()):
+                        break
+                    earliest = min((e.deadline for e in self._pending.values()), default=None)
+                    self._cond.wait(None if earliest is None else earliest - now)
+                if self._closed:
+                    return
+                entries = self._take(time.monotonic())
+            self._dispatch(entries)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.flush()
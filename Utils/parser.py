@@ -1,36 +1,223 @@
 import json
-from typing import List, Dict
+from typing import Dict, Iterable, Iterator, List, Optional, TypedDict
 
-def parse_perplexity_response(response: str) -> List[Dict[str, str]]:
+def _text(value) -> str:
+    if value is None:
+        return ""
+    return value.strip() if isinstance(value, str) else str(value).strip()
+
+def normalize_post(item) -> Optional[Dict[str, str]]:
     """
-    Parses a strict JSON response from Perplexity into a list of post dictionaries.
-    Handles news, jobs, and internships with flexible key extraction.
+    Maps one raw item from Perplexity onto the post shape used by the uploaders.
+    Returns None if the item is not usable (no title or link).
+    """
+    if not isinstance(item, dict):
+        return None
+
+    post = {
+        "title": _text(item.get("title")),
+        "description": _text(item.get("summary", item.get("description", ""))),
+        "link": _text(item.get("link")),
+        "company": _text(item.get("company")),
+        "location": _text(item.get("location"))
+    }
+
+    if post["title"] and post["link"]:
+        return post
+    return None
+
+class IncrementalPostParser:
+    """
+    Pulls JSON objects out of a (possibly streamed) model response.
+
+    Text is fed in arbitrary chunks; every object that closes directly inside
+    an array, or at the top level, is decoded as soon as its closing brace
+    arrives. Anything outside those objects — code fences, prose, a missing
+    closing bracket — is ignored, and an object that fails to decode is
+    skipped without affecting its neighbours.
     """
-    try:
-        data = json.loads(response.strip())
 
-        if not isinstance(data, list):
-            print("❌ Response is not a JSON array.")
-            return []
+    def __init__(self):
+        self._stack = []          # open containers: "[" or "{"
+        self._in_string = False
+        self._escaped = False
+        self._current = []        # characters of the object being captured
+        self._capture_depth = None
 
-        posts = []
-        for item in data:
-            if not isinstance(item, dict):
+    def feed(self, chunk: str) -> List[dict]:
+        objects = []
+        for ch in chunk:
+            if self._capture_depth is not None:
+                self._current.append(ch)
+
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif ch == "\\":
+                    self._escaped = True
+                elif ch == '"':
+                    self._in_string = False
                 continue
 
-            post = {
-                "title": item.get("title", "").strip(),
-                "description": item.get("summary", item.get("description", "")).strip(),
-                "link": item.get("link", "").strip(),
-                "company": item.get("company", "").strip(),
-                "location": item.get("location", "").strip()
-            }
+            if ch == '"':
+                if self._stack:
+                    self._in_string = True
+            elif ch in "[{":
+                if ch == "{" and self._capture_depth is None and (not self._stack or self._stack[-1] == "["):
+                    self._capture_depth = len(self._stack)
+                    self._current = [ch]
+                self._stack.append(ch)
+            elif ch in "]}":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if ch == "}" and self._capture_depth == len(self._stack):
+                    raw = "".join(self._current)
+                    self._current = []
+                    self._capture_depth = None
+                    try:
+                        obj = json.loads(raw)
+                    except json.JSONDecodeError as e:
+                        print(f"⚠️ Skipping malformed item: {e}")
+                        continue
+                    if isinstance(obj, dict):
+                        objects.append(obj)
+        return objects
 
-            if post["title"] and post["link"]:
-                posts.append(post)
+    def close(self) -> List[dict]:
+        """
+        Ends the stream. A trailing partial object is dropped.
+        """
+        if self._capture_depth is not None:
+            print("⚠️ Response was truncated; dropping the incomplete last item.")
+        self._stack = []
+        self._current = []
+        self._capture_depth = None
+        self._in_string = False
+        return []
 
-        return posts
+def iter_posts(chunks: Iterable[str]) -> Iterator[Dict[str, str]]:
+    """
+    Yields normalized posts from streamed text chunks as each one completes.
+    """
+    parser = IncrementalPostParser()
+    for chunk in chunks:
+        for item in parser.feed(chunk):
+            post = normalize_post(item)
+            if post:
+                yield post
+                continue
+            # Wrapped output such as {"posts": [...]}
+            for value in item.values():
+                if isinstance(value, list):
+                    for nested in value:
+                        post = normalize_post(nested)
+                        if post:
+                            yield post
+    parser.close()
 
-    except json.JSONDecodeError as e:
-        print(f"❌ JSON parse error: {e}")
+def parse_perplexity_response(response: str) -> List[Dict[str, str]]:
+    """
+    Parses a JSON response from Perplexity into a list of post dictionaries.
+    Handles news, jobs, and internships with flexible key extraction.
+    Tolerates markdown fences, surrounding prose, truncated arrays and
+    individual malformed items.
+    """
+    if not response:
         return []
+
+    posts = list(iter_posts([response]))
+    if not posts:
+        print("❌ No valid posts found in response.")
+    return posts
+
+class NewsItem(TypedDict):
+    title: str
+    summary: str
+    link: str
+
+class JobItem(TypedDict):
+    title: str
+    company: str
+    location: str
+    link: str
+
+# Schema of each category in a combined (multi-category) response.
+CATEGORY_SCHEMAS = {
+    "news_articles": NewsItem,
+    "jobs": JobItem,
+    "internships": JobItem,
+}
+
+def category_json_schema(categories: Iterable[str]) -> Dict:
+    """
+    JSON schema for {"<category>": [<item>, ...], ...}, suitable for
+    structured-output requests.
+    """
+    properties = {}
+    for category in categories:
+        fields = list(CATEGORY_SCHEMAS[category].__annotations__)
+        properties[category] = {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {field: {"type": "string"} for field in fields},
+                "required": fields,
+            },
+        }
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+def validate_item(category: str, item) -> Optional[Dict[str, str]]:
+    """
+    Checks one item against its category schema and normalizes it.
+    """
+    if not isinstance(item, dict):
+        return None
+    for field in CATEGORY_SCHEMAS[category].__annotations__:
+        value = item.get(field)
+        if not isinstance(value, str) or not value.strip():
+            return None
+    if not item["link"].strip().lower().startswith(("https://", "http://")):
+        return None
+    return normalize_post(item)
+
+def _extract_object(response: str) -> Optional[dict]:
+    text = response.strip()
+    start = text.find("{")
+    while start != -1:
+        try:
+            data, _ = json.JSONDecoder().raw_decode(text, start)
+        except json.JSONDecodeError:
+            start = text.find("{", start + 1)
+            continue
+        if isinstance(data, dict):
+            return data
+        start = text.find("{", start + 1)
+    return None
+
+def parse_combined_response(response: Optional[str], categories: Iterable[str]) -> Dict[str, Optional[List[Dict[str, str]]]]:
+    """
+    Parses a keyed multi-category response.
+
+    Returns {category: posts}; a category maps to None when it is missing,
+    not an array, or has no item that passes validation, so the caller can
+    fall back to a dedicated request for it.
+    """
+    categories = list(categories)
+    data = _extract_object(response) if response else None
+    if data is None:
+        print("❌ Combined response is not a JSON object.")
+        return {category: None for category in categories}
+
+    results = {}
+    for category in categories:
+        items = data.get(category)
+        if not isinstance(items, list):
+            print(f"⚠️ Combined response has no array for {category}")
+            results[category] = None
+            continue
+        posts = [post for post in (validate_item(category, item) for item in items) if post]
+        if len(posts) < len(items):
+            print(f"⚠️ {len(items) - len(posts)} {category} items failed validation")
+        results[category] = posts or None
+    return results
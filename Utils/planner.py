@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 📈 Each category is refreshed on its own interval, adapted to its recent
+# yield of new items: a run that finds nothing widens the interval, a run
+# that finds at least REFRESH_TARGET_YIELD new items narrows it, always
+# within [REFRESH_MIN_MINUTES, REFRESH_MAX_MINUTES]. Categories start at
+# SCHEDULE_FETCH_<CATEGORY>_MINUTES (default 60).
+REFRESH_MIN_MINUTES = float(os.getenv("REFRESH_MIN_MINUTES", "15"))
+REFRESH_MAX_MINUTES = float(os.getenv("REFRESH_MAX_MINUTES", "360"))
+REFRESH_TARGET_YIELD = int(os.getenv("REFRESH_TARGET_YIELD", "3"))
+REFRESH_WIDEN = float(os.getenv("REFRESH_WIDEN", "1.5"))
+REFRESH_NARROW = float(os.getenv("REFRESH_NARROW", "0.5"))
+# Recent yields kept per category (for status and diagnostics).
+REFRESH_HISTORY = 10
+
+PLAN_COLLECTION = "refresh_plans"
+
+
+def initial_interval(category: str) -> float:
+    minutes = float(os.getenv(f"SCHEDULE_FETCH_{category.upper()}_MINUTES", "60"))
+    return min(max(minutes, REFRESH_MIN_MINUTES), REFRESH_MAX_MINUTES) * 60
+
+
+class FirestorePlanStore:
+    """
+    Plans stored in refresh_plans/{category}, shared by every process.
+    """
+
+    def __init__(self, db=None):
+        self._db = db
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.firebase import get_db
+            self._db = get_db()
+        return self._db
+
+    def load(self, categories: List[str]) -> Dict[str, Dict]:
+        refs = [self.db.collection(PLAN_COLLECTION).document(c) for c in categories]
+        plans = {}
+        for snap in self.db.get_all(refs):
+            if snap.exists:
+                plans[snap.id] = snap.to_dict() or {}
+        return plans
+
+    def save(self, category: str, plan: Dict):
+        self.db.collection(PLAN_COLLECTION).document(category).set(plan)
+
+
+class FilePlanStore:
+    """
+    Plans stored in one JSON file; for tests and single-host setups.
+    """
+
+    _guard = threading.Lock()
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def load(self, categories: List[str]) -> Dict[str, Dict]:
+        with self._guard:
+            data = self._read()
+        return {c: data[c] for c in categories if c in data}
+
+    def save(self, category: str, plan: Dict):
+        with self._guard:
+            data = self._read()
+            data[category] = plan
+            tmp = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp, self.path)
+
+
+def make_plan_store(db=None, backend: Optional[str] = None):
+    """
+    Builds a plan store from REFRESH_PLAN_STORE ("firestore" or "file").
+    """
+    backend = (backend or os.getenv("REFRESH_PLAN_STORE", "firestore")).lower()
+    if backend == "file":
+        return FilePlanStore(os.getenv("REFRESH_PLAN_FILE", ".refresh_plans.json"))
+    return FirestorePlanStore(db)
+
+
+class RefreshPlanner:
+    """
+    Decides which categories are due and adapts their intervals.
+
+    Plan per category: {"interval", "last_success", "last_attempt",
+    "yields", "failures"}, times in unix seconds.
+
+    Usage:
+        due, fresh = planner.plan(["news_articles", "jobs"])
+        ...refresh `due`...
+        planner.record("jobs", new_count=4)
+    """
+
+    def __init__(self, store=None):
+        self.store = store or make_plan_store()
+        self._lock = threading.Lock()
+
+    def _plans(self, categories: List[str]) -> Dict[str, Dict]:
+        try:
+            stored = self.store.load(categories)
+        except Exception as e:
+            print("⚠️ Could not load refresh plans, treating every category as due:", e)
+            stored = {}
+        return {
+            c: {"interval": initial_interval(c), "last_success": None, "last_attempt": None,
+                "yields": [], "failures": 0, **stored.get(c, {})}
+            for c in categories
+        }
+
+    def plan(self, categories: Iterable[str], force: bool = False, now: Optional[float] = None) -> Tuple[List[str], List[str]]:
+        """
+        Splits categories into (due, fresh). With force every category is due.
+        """
+        categories = list(dict.fromkeys(categories))
+        if force:
+            return categories, []
+        now = now or time.time()
+        due, fresh = [], []
+        for category, plan in self._plans(categories).items():
+            last = plan["last_success"]
+            if last is None or now - last >= plan["interval"]:
+                due.append(category)
+            else:
+                fresh.append(category)
+        return due, fresh
+
+    def record(self, category: str, new_count: int = 0, ok: bool = True, now: Optional[float] = None) -> Dict:
+        """
+        Stores the outcome of a refresh and returns the updated plan. Failed
+        runs leave the interval alone so the category is retried next tick.
+        """
+        now = now or time.time()
+        with self._lock:
+            plan = self._plans([category])[category]
+            plan["last_attempt"] = now
+            if ok:
+                plan["last_success"] = now
+                plan["failures"] = 0
+                plan["yields"] = (list(plan["yields"]) + [new_count])[-REFRESH_HISTORY:]
+                if new_count <= 0:
+                    plan["interval"] *= REFRESH_WIDEN
+                elif new_count >= REFRESH_TARGET_YIELD:
+                    plan["interval"] *= REFRESH_NARROW
+                plan["interval"] = min(max(plan["interval"], REFRESH_MIN_MINUTES * 60), REFRESH_MAX_MINUTES * 60)
+            else:
+                plan["failures"] += 1
+            try:
+                self.store.save(category, plan)
+            except Exception as e:
+                print(f"⚠️ Could not save refresh plan for {category}:", e)
+        return plan
+
+    def status(self, categories: Iterable[str], now: Optional[float] = None) -> Dict[str, Dict]:
+        now = now or time.time()
+        result = {}
+        for category, plan in self._plans(list(categories)).items():
+            last = plan["last_success"]
+            result[category] = {
+                "interval_minutes": round(plan["interval"] / 60, 1),
+                "last_success": last,
+                "due_in_seconds": 0 if last is None else max(0, round(last + plan["interval"] - now)),
+                "recent_yields": plan["yields"],
+                "failures": plan["failures"],
+            }
+        return result
@@ -0,0 +1,106 @@
+import os
+import json
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+
+OTHER = "Other"
+
+PLATFORMS_CONFIG = os.getenv(
+    "PLATFORMS_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "platforms.json"),
+)
+
+# Trie node key holding the platform name for a complete domain.
+_LEAF = "$"
+
+
+def load_platform_registry(path: Optional[str] = None) -> Dict[str, List[str]]:
+    """
+    Reads {"Platform": ["domain", ...]} from the platform config file.
+    """
+    with open(path or PLATFORMS_CONFIG, encoding="utf-8") as f:
+        return json.load(f)
+
+
+@lru_cache(maxsize=8192)
+def host_of(url: str) -> str:
+    """
+    Lowercased hostname of a URL, without a leading "www." or port.
+    """
+    try:
+        host = urlsplit(url.strip()).hostname or ""
+    except ValueError:
+        return ""
+    host = host.rstrip(".")
+    return host[4:] if host.startswith("www.") else host
+
+
+class PlatformMatcher:
+    """
+    Maps hosts to platforms with a reversed-label suffix trie.
+
+    "jobs.linkedin.com" is looked up as com -> linkedin -> jobs and the
+    deepest registered domain wins, so a lookup costs one dict hit per host
+    label and "linkedin.com.evil.io" or "notlinkedin.com" never match.
+    """
+
+    def __init__(self, registry: Dict[str, Iterable[str]]):
+        self._root: Dict = {}
+        for platform, domains in registry.items():
+            for domain in domains:
+                node = self._root
+                for label in reversed(domain.lower().strip(".").split(".")):
+                    node = node.setdefault(label, {})
+                node[_LEAF] = platform
+
+    def match_host(self, host: str) -> str:
+        node = self._root
+        found = OTHER
+        for label in reversed(host.split(".")):
+            node = node.get(label)
+            if node is None:
+                break
+            found = node.get(_LEAF, found)
+        return found
+
+    def classify(self, url: str) -> str:
+        if not url:
+            return OTHER
+        return self.match_host(host_of(url))
+
+    def classify_many(self, urls: Iterable[str]) -> List[str]:
+        match_host = self.match_host
+        return [match_host(host_of(url)) if url else OTHER for url in urls]
+
+
+_matcher: Optional[PlatformMatcher] = None
+
+
+def get_matcher() -> PlatformMatcher:
+    global _matcher
+    if _matcher is None:
+        _matcher = PlatformMatcher(load_platform_registry())
+    return _matcher
+
+
+def extract_platform_from_link(url: str) -> str:
+    return get_matcher().classify(url)
+
+
+def filter_unique_platform_posts(posts, limit: int = 5):
+    """
+    Keeps at most one post per known platform, up to `limit` posts.
+    `posts` may be any iterable; it is consumed only until the limit is hit.
+    """
+    matcher = get_matcher()
+    seen_platforms = set()
+    filtered = []
+    for post in posts:
+        platform = matcher.classify(post.get("link", ""))
+        if platform not in seen_platforms and platform != OTHER:
+            seen_platforms.add(platform)
+            filtered.append(post)
+        if len(filtered) == limit:
+            break
+    return filtered
@@ -0,0 +1,254 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, Optional
+
+from apscheduler.schedulers.background import BackgroundScheduler
+
+# Identifies this process as a lease owner.
+OWNER_ID = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+LOCK_COLLECTION = "scheduler_locks"
+
+
+class FirestoreLease:
+    """
+    Lease stored in scheduler_locks/{name}. Acquiring is a transaction that
+    succeeds if the lease is free, expired or already ours, and (with
+    `min_interval`) the last completed run is at least that many seconds old.
+    """
+
+    def __init__(self, name: str, db=None):
+        self.name = name
+        self._db = db
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.firebase import get_db
+            self._db = get_db()
+        return self._db
+
+    @property
+    def ref(self):
+        return self.db.collection(LOCK_COLLECTION).document(self.name.replace("/", "_"))
+
+    def acquire(self, ttl: float, owner: str = OWNER_ID, min_interval: float = 0) -> bool:
+        from google.cloud import firestore as gcf
+
+        now = datetime.now(timezone.utc)
+
+        @gcf.transactional
+        def take(transaction):
+            snap = self.ref.get(transaction=transaction)
+            data = snap.to_dict() if snap.exists else {}
+            expires = data.get("expires_at")
+            if data.get("owner") not in (None, owner) and expires and expires > now:
+                return False
+            last_run = data.get("last_run")
+            if min_interval and last_run and last_run + timedelta(seconds=min_interval) > now:
+                return False
+            transaction.set(self.ref, {
+                "owner": owner,
+                "acquired_at": now,
+                "expires_at": now + timedelta(seconds=ttl),
+            }, merge=True)
+            return True
+
+        try:
+            return take(self.db.transaction())
+        except Exception as e:
+            print(f"⚠️ Lease {self.name} acquire failed: {e}")
+            return False
+
+    def release(self, owner: str = OWNER_ID, completed: bool = False):
+        """
+        Frees the lease; with `completed` the run's start is kept as last_run.
+        """
+        from google.cloud import firestore as gcf
+
+        @gcf.transactional
+        def drop(transaction):
+            snap = self.ref.get(transaction=transaction)
+            data = (snap.to_dict() or {}) if snap.exists else {}
+            if data.get("owner") != owner:
+                return
+            freed = {"owner": None, "expires_at": None}
+            if completed:
+                freed["last_run"] = data.get("acquired_at")
+            transaction.update(self.ref, freed)
+
+        try:
+            drop(self.db.transaction())
+        except Exception as e:
+            print(f"⚠️ Lease {self.name} release failed: {e}")
+
+
+class FileLease:
+    """
+    Lease stored as a small JSON file; for tests and single-host setups.
+    """
+
+    _guard = threading.Lock()
+
+    def __init__(self, directory: str, name: str):
+        os.makedirs(directory, exist_ok=True)
+        self.name = name
+        self.path = os.path.join(directory, f"{name.replace('/', '_').replace(':', '_')}.lease")
+
+    def _read(self) -> Dict:
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write(self, data: Dict, owner: str):
+        tmp = f"{self.path}.{owner}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+
+    def acquire(self, ttl: float, owner: str = OWNER_ID, min_interval: float = 0) -> bool:
+        with self._guard:
+            data = self._read()
+            now = time.time()
+            if data.get("owner") not in (None, owner) and (data.get("expires_at") or 0) > now:
+                return False
+            if min_interval and (data.get("last_run") or 0) + min_interval > now:
+                return False
+            self._write({**data, "owner": owner, "acquired_at": now, "expires_at": now + ttl}, owner)
+            # Another process may have replaced the file at the same moment.
+            return self._read().get("owner") == owner
+
+    def release(self, owner: str = OWNER_ID, completed: bool = False):
+        with self._guard:
+            data = self._read()
+            if data.get("owner") != owner:
+                return
+            if completed:
+                data["last_run"] = data.get("acquired_at")
+            self._write({**data, "owner": None, "expires_at": None}, owner)
+
+
+def make_lease(name: str, db=None, backend: Optional[str] = None):
+    """
+    Builds a lease from SCHEDULER_LOCK ("firestore" or "file").
+    """
+    backend = (backend or os.getenv("SCHEDULER_LOCK", "firestore")).lower()
+    if backend == "file":
+        return FileLease(os.getenv("SCHEDULER_LOCK_DIR", ".scheduler_locks"), name)
+    return FirestoreLease(name, db)
+
+
+class LeaderScheduler:
+    """
+    APScheduler wrapper where each job runs once per interval across all
+    processes.
+
+    Before a run the job's lease is taken; a process that can't get it (or
+    that is still running the previous run) skips that tick. The lease also
+    records when the job last ran, so a tick on another worker that comes
+    before last_run + interval (less the jitter) is skipped too. Intervals get
+    random jitter so workers started together don't contend every time.
+    """
+
+    def __init__(self, db=None, jitter: float = 30, lock_backend: Optional[str] = None):
+        self.db = db
+        self.jitter = jitter
+        self.lock_backend = lock_backend
+        self._scheduler = BackgroundScheduler()
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def add_job(self, name: str, func: Callable, seconds: float, lease_ttl: Optional[float] = None):
+        """
+        Registers `func` to run every `seconds`. The lease outlives a run by
+        default for up to one interval, so a crashed leader frees it in time.
+        """
+        self._jobs[name] = {
+            "name": name,
+            "func": func,
+            "interval": seconds,
+            "lease": make_lease(name, self.db, self.lock_backend),
+            "lease_ttl": lease_ttl or seconds,
+            "running": threading.Lock(),
+            "last_run": None,
+            "last_duration": None,
+            "last_outcome": None,
+            "last_error": None,
+            "runs": 0,
+            "skipped": 0,
+        }
+        self._scheduler.add_job(
+            self.run_job, "interval", args=[name], id=name, seconds=seconds,
+            jitter=self.jitter, max_instances=1, coalesce=True,
+        )
+
+    def run_job(self, name: str) -> str:
+        """
+        Runs one tick of a job now; returns "ok", "error" or "skipped".
+        """
+        job = self._jobs[name]
+        if not job["running"].acquire(blocking=False):
+            return self._skip(job, "previous run still in progress")
+        try:
+            # Ticks are delayed by up to `jitter`, so allow that much slack.
+            min_interval = max(job["interval"] - self.jitter, 0)
+            if not job["lease"].acquire(job["lease_ttl"], min_interval=min_interval):
+                return self._skip(job, "lease held or job ran recently on another process")
+            started = datetime.now(timezone.utc)
+            t0 = time.perf_counter()
+            outcome, error = "ok", None
+            try:
+                job["func"]()
+            except Exception as e:
+                outcome, error = "error", str(e)
+                print(f"❌ Scheduled job {name} failed:", e)
+            finally:
+                job["lease"].release(completed=True)
+            with self._lock:
+                job["last_run"] = started
+                job["last_duration"] = time.perf_counter() - t0
+                job["last_outcome"] = outcome
+                job["last_error"] = error
+                job["runs"] += 1
+            return outcome
+        finally:
+            job["running"].release()
+
+    def _skip(self, job: Dict, reason: str) -> str:
+        with self._lock:
+            job["skipped"] += 1
+        print(f"⏭️ Skipping {job['name']}: {reason}")
+        return "skipped"
+
+    def start(self):
+        if not self._scheduler.running:
+            self._scheduler.start()
+
+    def shutdown(self):
+        if self._scheduler.running:
+            self._scheduler.shutdown(wait=False)
+
+    def status(self) -> Dict[str, Dict]:
+        with self._lock:
+            result = {}
+            for name, job in self._jobs.items():
+                aps_job = self._scheduler.get_job(name)
+                result[name] = {
+                    "interval_seconds": job["interval"],
+                    "running": job["running"].locked(),
+                    "last_run": job["last_run"].isoformat() if job["last_run"] else None,
+                    "last_duration": job["last_duration"],
+                    "last_outcome": job["last_outcome"],
+                    "last_error": job["last_error"],
+                    "runs": job["runs"],
+                    "skipped": job["skipped"],
+                    "next_run": aps_job.next_run_time.isoformat() if aps_job and aps_job.next_run_time else None,
+                }
+            return result
@@ -0,0 +1,217 @@
+import os
+import math
+import time
+import threading
+from array import array
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.keywords import extract_keywords, tokenize
+
+# Collections served by /search, keyed by the name clients filter on.
+SEARCH_COLLECTIONS = {
+    "news": "news_articles",
+    "jobs": "internships_jobs",
+}
+# The index is rebuilt from Firestore in the background after this many
+# seconds, so documents written by other processes (e.g. the cron worker)
+# become searchable too.
+SEARCH_INDEX_TTL = float(os.getenv("SEARCH_INDEX_TTL", "900"))
+# Fields returned with each hit.
+STORED_FIELDS = ("title", "summary", "url", "link", "company", "location", "type")
+
+
+def keywords_for(data: Dict) -> List[str]:
+    """
+    Keywords of a news or job document, from its stored field or its text.
+    """
+    if data.get("keywords"):
+        return list(data["keywords"])
+    return extract_keywords(
+        data.get("title", ""),
+        data.get("summary") or data.get("description"),
+        data.get("company"),
+        data.get("location"),
+    )
+
+
+def _epoch(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0.0
+
+
+class SearchIndex:
+    """
+    In-process inverted index over news and job documents.
+
+    Each document gets an integer ID; every keyword maps to a posting list
+    (array of those IDs, ascending). Removed documents are tombstoned and the
+    postings are compacted once tombstones make up a quarter of the index.
+    """
+
+    def __init__(self, collections: Iterable[str] = SEARCH_COLLECTIONS.values()):
+        self.collections = set(collections)
+        self.loaded_at: Optional[float] = None
+        self._lock = threading.RLock()
+        self._loading = False
+        self._clear()
+
+    def _clear(self):
+        self._ids: Dict[Tuple[str, str], int] = {}
+        self._docs: List[Optional[Dict]] = []
+        self._title_terms: List[frozenset] = []
+        self._postings: Dict[str, array] = {}
+        self._dead = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._ids)
+
+    def add(self, collection: str, doc_id: str, data: Dict):
+        """
+        Indexes (or re-indexes) one document. Other collections are ignored.
+        """
+        if collection not in self.collections:
+            return
+        record = {field: data[field] for field in STORED_FIELDS if data.get(field)}
+        record.update(id=doc_id, collection=collection, timestamp=data.get("timestamp"))
+        terms = set(keywords_for(data))
+        with self._lock:
+            self._remove_locked(collection, doc_id)
+            internal = len(self._docs)
+            self._ids[(collection, doc_id)] = internal
+            self._docs.append(record)
+            self._title_terms.append(frozenset(tokenize(data.get("title"))))
+            for term in terms:
+                self._postings.setdefault(term, array("I")).append(internal)
+
+    def add_many(self, collection: str, docs: Iterable[Tuple[str, Dict]]):
+        for doc_id, data in docs:
+            self.add(collection, doc_id, data)
+
+    def _remove_locked(self, collection: str, doc_id: str):
+        internal = self._ids.pop((collection, doc_id), None)
+        if internal is not None:
+            self._docs[internal] = None
+            self._dead += 1
+
+    def remove(self, collection: str, doc_ids: Iterable[str]):
+        """
+        Drops documents, e.g. after retention deletes them.
+        """
+        if collection not in self.collections:
+            return
+        with self._lock:
+            for doc_id in doc_ids:
+                self._remove_locked(collection, doc_id)
+            if self._dead and self._dead * 4 >= len(self._docs):
+                self._compact()
+
+    def _compact(self):
+        keep = [i for i, doc in enumerate(self._docs) if doc is not None]
+        remap = {old: new for new, old in enumerate(keep)}
+        postings = {}
+        for term, ids in self._postings.items():
+            live = array("I", (remap[i] for i in ids if i in remap))
+            if live:
+                postings[term] = live
+        self._docs = [self._docs[i] for i in keep]
+        self._title_terms = [self._title_terms[i] for i in keep]
+        self._ids = {(d["collection"], d["id"]): i for i, d in enumerate(self._docs)}
+        self._postings = postings
+        self._dead = 0
+
+    def _expand(self, term: str, last: bool) -> List[str]:
+        if term in self._postings or not last:
+            return [term]
+        # Type-ahead: an unknown last term matches keywords it prefixes.
+        return [t for t in self._postings if t.startswith(term)]
+
+    def search(self, query: str, collections: Optional[Iterable[str]] = None, limit: int = 20) -> List[Dict]:
+        """
+        Ranks documents by how many query terms they match, then by the
+        terms' rarity (title matches count double), then by recency.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+        wanted = set(collections) if collections else None
+
+        with self._lock:
+            live = max(len(self._ids), 1)
+            matched: Dict[int, int] = {}
+            scores: Dict[int, float] = {}
+            for position, term in enumerate(terms):
+                hits = set()
+                for expanded in self._expand(term, position == len(terms) - 1):
+                    ids = self._postings.get(expanded, ())
+                    idf = math.log(1 + live / max(len(ids), 1))
+                    for internal in ids:
+                        doc = self._docs[internal]
+                        if doc is None or (wanted and doc["collection"] not in wanted):
+                            continue
+                        weight = 2.0 if expanded in self._title_terms[internal] else 1.0
+                        scores[internal] = scores.get(internal, 0.0) + idf * weight
+                        hits.add(internal)
+                for internal in hits:
+                    matched[internal] = matched.get(internal, 0) + 1
+
+            ranked = sorted(
+                scores,
+                key=lambda i: (-matched[i], -scores[i], -_epoch(self._docs[i]["timestamp"])),
+            )[:limit]
+            return [dict(self._docs[i], score=round(scores[i], 3)) for i in ranked]
+
+    def rebuild(self, docs: Dict[str, Iterable[Tuple[str, Dict]]]):
+        """
+        Replaces the whole index with the given {collection: [(id, data)]}.
+        """
+        fresh = SearchIndex(self.collections)
+        for collection, items in docs.items():
+            fresh.add_many(collection, items)
+        with self._lock:
+            self._ids, self._docs = fresh._ids, fresh._docs
+            self._title_terms, self._postings = fresh._title_terms, fresh._postings
+            self._dead = fresh._dead
+            self.loaded_at = time.time()
+
+    def load(self, db=None):
+        """
+        Rebuilds the index from Firestore.
+        """
+        if db is None:
+            from utils.firebase import get_db
+            db = get_db()
+        docs = {}
+        for collection in self.collections:
+            docs[collection] = [(doc.id, doc.to_dict() or {}) for doc in db.collection(collection).stream()]
+        self.rebuild(docs)
+        print(f"🔎 Search index loaded with {len(self)} documents")
+
+    def ensure_loaded(self):
+        """
+        Loads on first use; afterwards reloads in the background once the
+        index is older than SEARCH_INDEX_TTL while serving the current one.
+        """
+        if self.loaded_at is None:
+            with self._lock:
+                if self.loaded_at is None:
+                    self.load()
+            return
+        if time.time() - self.loaded_at < SEARCH_INDEX_TTL:
+            return
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._reload, name="search-index", daemon=True).start()
+
+    def _reload(self):
+        try:
+            self.load()
+        except Exception as e:
+            print("❌ Search index reload failed:", e)
+        finally:
+            with self._lock:
+                self._loading = False
+
+
+search_index = SearchIndex()
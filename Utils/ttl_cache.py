@@ -0,0 +1,94 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from utils.metrics import count_cache
+
+# Returned by TTLCache.get for absent or expired keys (None is a valid value).
+MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU bounded by `max_entries`, with a per-entry expiry.
+    `on_evict(key)` runs for entries dropped by size, expiry or invalidation.
+    """
+
+    def __init__(self, name: str, max_entries: int, ttl: float, on_evict: Optional[Callable[[str], None]] = None):
+        self.name = name
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[str, Tuple[object, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def get(self, key: str):
+        """
+        Returns the cached value, or MISSING. Counts a hit or a miss.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            expired = entry is not None and entry[1] <= time.monotonic()
+            if entry is None or expired:
+                if expired:
+                    del self._data[key]
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        if entry is None or expired:
+            count_cache(self.name, "miss")
+            if expired:
+                self._evicted([key])
+            return MISSING
+        count_cache(self.name, "hit")
+        return entry[0]
+
+    def set(self, key: str, value, pinned: bool = False, ttl: Optional[float] = None):
+        """
+        Stores a value for `ttl` seconds (default: the cache's TTL); pinned
+        entries (kept fresh by a listener) don't expire.
+        """
+        expires = float("inf") if pinned else time.monotonic() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                evicted.append(self._data.popitem(last=False)[0])
+        self._evicted(evicted)
+
+    def update(self, key: str, value) -> bool:
+        """
+        Replaces a cached value in place, keeping its expiry. Returns False
+        if the key isn't cached.
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return False
+            self._data[key] = (value, entry[1])
+            return True
+
+    def invalidate(self, keys: Iterable[str]):
+        with self._lock:
+            dropped = [key for key in keys if self._data.pop(key, None) is not None]
+        self._evicted(dropped)
+
+    def _evicted(self, keys: List[str]):
+        if not keys:
+            return
+        count_cache(self.name, "eviction", len(keys))
+        if self.on_evict is not None:
+            for key in keys:
+                self.on_evict(key)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
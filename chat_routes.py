@@ -1,9 +1,59 @@
+from typing import Dict, List
 from fastapi import APIRouter, Body
-from firebase_admin import firestore
-from utils.fcm import send_fcm_notification
+from fastapi.concurrency import run_in_threadpool
+from utils.chat_cache import chat_directory
+from utils.fcm import send_fcm_multicast
+from utils.notify_queue import NotificationQueue, PendingNotification
 
 router = APIRouter()
-db = firestore.client()
+
+def resolve_fcm_token_map(user_ids: List[str]) -> Dict[str, str]:
+    """
+    FCM tokens of many users, from the chat directory cache; misses are
+    looked up with a single multi-document get. Users without a token are
+    left out.
+    """
+    if not user_ids:
+        return {}
+    return chat_directory.get_tokens(user_ids)
+
+def deliver_chat_notifications(room_id: str, entries: List[PendingNotification]):
+    """
+    Sends one push per recipient for everything queued in a room: the message
+    itself if there was one, otherwise "N new messages in <room>". Pushes share
+    a per-room collapse key so a device shows only the latest summary.
+    """
+    tokens = resolve_fcm_token_map([e.recipient for e in entries])
+    if not tokens:
+        print(f"⚠️ No FCM tokens for room {room_id}")
+        return
+
+    groups: Dict[tuple, List[str]] = {}
+    for entry in entries:
+        token = tokens.get(entry.recipient)
+        if not token:
+            continue
+        if entry.count == 1:
+            key = (1, "New Message", entry.last_text)
+        else:
+            key = (entry.count, entry.room_name, f"{entry.count} new messages in {entry.room_name}")
+        groups.setdefault(key, []).append(token)
+
+    for (count, title, body), group_tokens in groups.items():
+        report = send_fcm_multicast(
+            group_tokens, title=title, body=body,
+            data={"roomId": room_id, "count": str(count)},
+            collapse_key=f"chat_{room_id}",
+        )
+        print(f"✅ Room {room_id}: {report['success']}/{len(group_tokens)} notifications delivered")
+
+# 📬 Pushes are debounced per recipient and room (see utils/notify_queue.py)
+notification_queue = NotificationQueue(deliver_chat_notifications)
+
+@router.on_event("shutdown")
+def flush_chat_notifications():
+    notification_queue.close()
+    chat_directory.close()
 
 @router.post("/send-chat-notification")
 async def send_chat_notification(payload: dict = Body(...)):
@@ -11,23 +61,17 @@ async def send_chat_notification(payload: dict = Body(...)):
     sender_uid = payload.get("sender")
     message = payload.get("text")
 
-    room_ref = db.collection("chat_rooms").document(room_id)
-    room_doc = room_ref.get()
-    if not room_doc.exists:
+    # 💾 Warm rooms are served from the cache without a Firestore read
+    cached, room = chat_directory.peek_room(room_id)
+    if not cached:
+        room = await run_in_threadpool(chat_directory.load_room, room_id)
+    if room is None:
         return {"error": "Room not found"}
 
-    participants = room_doc.to_dict().get("participants", [])
+    participants = room["participants"]
     recipients = [uid for uid in participants if uid != sender_uid]
 
-    for recipient_uid in recipients:
-        user_doc = db.collection("users").document(recipient_uid).get()
-        if user_doc.exists:
-            fcm_token = user_doc.to_dict().get("fcm_token")
-            if fcm_token:
-                send_fcm_notification(
-                    token=fcm_token,
-                    title="New Message",
-                    body=message
-                )
+    # 📤 Queued; token lookup and FCM sends happen when the room's window closes
+    notification_queue.add(room_id, recipients, message, room_name=room.get("name"))
 
     return {"status": "Notification sent"}
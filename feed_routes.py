@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import base64
+import hashlib
+import threading
+from bisect import bisect_right
+from datetime import datetime
+from typing import Dict, List, Optional
+from fastapi import APIRouter, Header, Query, Response
+from firebase_admin import firestore
+from utils.firebase import get_db
+
+router = APIRouter()
+
+FEEDS = {
+    "news": "news_articles",
+    "jobs": "internships_jobs",
+}
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", "1000"))
+# Snapshots are also reloaded after this many seconds so writes made by other
+# processes (e.g. the cron worker) show up without an explicit invalidation.
+FEED_SNAPSHOT_TTL = float(os.getenv("FEED_SNAPSHOT_TTL", "300"))
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+# Serialized pages kept per snapshot.
+FEED_PAGE_CACHE_SIZE = 256
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def _timestamp(item: Dict) -> float:
+    ts = item.get("timestamp")
+    return ts.timestamp() if isinstance(ts, datetime) else 0.0
+
+
+class FeedSnapshot:
+    """
+    Immutable, newest-first copy of one collection plus everything needed
+    to page through it without touching Firestore.
+    """
+
+    def __init__(self, items: List[Dict]):
+        self.items = sorted(items, key=lambda i: (-_timestamp(i), i["id"]))
+        self.keys = [(-_timestamp(i), i["id"]) for i in self.items]
+        self.loaded_at = time.time()
+        digest = hashlib.sha1(json.dumps(self.items, default=_json_default, sort_keys=True).encode("utf-8"))
+        self.digest = digest.hexdigest()[:16]
+        self.pages: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+
+    def page(self, cursor: Optional[str], limit: int, type_: Optional[str], location: Optional[str]):
+        start = 0
+        if cursor:
+            key = decode_cursor(cursor)
+            if key is not None:
+                start = bisect_right(self.keys, key)
+
+        type_ = type_.casefold() if type_ else None
+        location = location.casefold() if location else None
+        page = []
+        last = None
+        next_cursor = None
+        for index in range(start, len(self.items)):
+            item = self.items[index]
+            if type_ and str(item.get("type", "")).casefold() != type_:
+                continue
+            if location and location not in str(item.get("location", "")).casefold():
+                continue
+            if len(page) == limit:
+                # Only hand out a cursor when another matching item exists.
+                next_cursor = encode_cursor(self.keys[last])
+                break
+            page.append(item)
+            last = index
+        return page, next_cursor
+
+    def cached_page(self, etag: str, build) -> bytes:
+        with self._lock:
+            body = self.pages.get(etag)
+        if body is None:
+            body = build()
+            with self._lock:
+                if len(self.pages) >= FEED_PAGE_CACHE_SIZE:
+                    self.pages.pop(next(iter(self.pages)))
+                self.pages[etag] = body
+        return body
+
+
+def encode_cursor(key) -> str:
+    raw = json.dumps([key[0], key[1]]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        ts, doc_id = json.loads(raw)
+        return (float(ts), str(doc_id))
+    except Exception:
+        return None
+
+
+_snapshots: Dict[str, FeedSnapshot] = {}
+_lock = threading.Lock()
+
+
+def _load(feed: str) -> FeedSnapshot:
+    query = (
+        get_db()
+        .collection(FEEDS[feed])
+        .order_by("timestamp", direction=firestore.Query.DESCENDING)
+        .limit(FEED_MAX_ITEMS)
+    )
+    items = []
+    for doc in query.stream():
+        item = doc.to_dict() or {}
+        item["id"] = doc.id
+        items.append(item)
+    print(f"📰 Loaded {len(items)} items into the {feed} feed snapshot")
+    return FeedSnapshot(items)
+
+
+def get_snapshot(feed: str) -> FeedSnapshot:
+    snapshot = _snapshots.get(feed)
+    if snapshot is not None and time.time() - snapshot.loaded_at < FEED_SNAPSHOT_TTL:
+        return snapshot
+    with _lock:
+        snapshot = _snapshots.get(feed)
+        if snapshot is None or time.time() - snapshot.loaded_at >= FEED_SNAPSHOT_TTL:
+            snapshot = _load(feed)
+            _snapshots[feed] = snapshot
+    return snapshot
+
+
+def refresh_feeds(*feeds: str):
+    """
+    Reloads the given feeds (all by default) so the next poll is served warm.
+    """
+    for feed in feeds or FEEDS:
+        try:
+            snapshot = _load(feed)
+        except Exception as e:
+            print(f"❌ Feed refresh failed for {feed}: {e}")
+            invalidate_feeds(feed)
+            continue
+        with _lock:
+            _snapshots[feed] = snapshot
+
+
+def invalidate_feeds(*feeds: str):
+    """
+    Drops the given feeds (all by default); they reload on the next request.
+    """
+    with _lock:
+        for feed in feeds or list(FEEDS):
+            _snapshots.pop(feed, None)
+
+
+def feeds_for_collection(collection: str) -> List[str]:
+    return [feed for feed, name in FEEDS.items() if name == collection]
+
+
+def _serve(feed: str, cursor, limit, type_, location, if_none_match) -> Response:
+    snapshot = get_snapshot(feed)
+    params = json.dumps([cursor, limit, type_, location])
+    etag = f'"{feed}-{snapshot.digest}-{hashlib.sha1(params.encode("utf-8")).hexdigest()[:12]}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    def build() -> bytes:
+        items, next_cursor = snapshot.page(cursor, limit, type_, location)
+        body = {"items": items, "count": len(items), "next_cursor": next_cursor}
+        return json.dumps(body, default=_json_default).encode("utf-8")
+
+    return Response(content=snapshot.cached_page(etag, build), media_type="application/json", headers=headers)
+
+
+@router.get("/feed/news")
+def feed_news(
+    cursor: Optional[str] = None,
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    if_none_match: Optional[str] = Header(default=None),
+):
+    return _serve("news", cursor, limit, None, None, if_none_match)
+
+
+@router.get("/feed/jobs")
+def feed_jobs(
+    cursor: Optional[str] = None,
+    limit: int = Query(FEED_PAGE_SIZE, ge=1, le=FEED_MAX_PAGE_SIZE),
+    type: Optional[str] = Query(None, description="Job or Internship"),
+    location: Optional[str] = None,
+    if_none_match: Optional[str] = Header(default=None),
+):
+    return _serve("jobs", cursor, limit, type, location, if_none_match)
@@ -0,0 +1,178 @@
+import os
+import re
+import hashlib
+from datetime import datetime, timezone
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+from utils.metrics import timed
+
+# Query parameters that only identify where a click came from.
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid",
+    "ref", "ref_src", "refid", "trk", "trkid", "si", "spm",
+}
+TRACKING_PREFIXES = ("utm_", "pk_", "_hs", "mkt_")
+
+# Firestore's getAll accepts large batches, but keep each RPC reasonably sized.
+LOOKUP_CHUNK_SIZE = 300
+
+# 🕰️ Documents written before content IDs have random (or title-link md5)
+# IDs that the ID lookup can't find. Candidates the lookup misses are also
+# matched by title with batched `in` queries (no composite index needed).
+# Those documents are gone once they age out of retention, so the fallback
+# only runs until DEDUP_LEGACY_UNTIL (ISO date, UTC), e.g. the deploy date
+# plus the longest retention window. Unset, it is off.
+DEDUP_LEGACY_UNTIL = os.getenv("DEDUP_LEGACY_UNTIL", "")
+# Firestore allows at most 30 values in an `in` filter.
+TITLE_CHUNK_SIZE = 30
+# Field holding the post's link, per collection.
+LINK_FIELDS = {"news_articles": "url", "internships_jobs": "link"}
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize_title(title: str) -> str:
+    """
+    Case- and whitespace-insensitive form of a title.
+    """
+    return _whitespace.sub(" ", (title or "").strip()).casefold()
+
+
+def normalize_url(url: str) -> str:
+    """
+    Canonical form of a link used for deduplication.
+
+    Lowercases scheme and host, drops default ports, fragments, tracking
+    parameters and trailing slashes, and sorts the remaining query string.
+    """
+    url = (url or "").strip()
+    if not url:
+        return ""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url.casefold()
+
+    scheme = (parts.scheme or "https").lower()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    port = parts.port if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)) else None
+    netloc = f"{host}:{port}" if port else host
+
+    path = _whitespace.sub("", parts.path).rstrip("/")
+    query = [
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    ]
+    query.sort()
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+def content_id(title: str, link: str = "") -> str:
+    """
+    Stable document ID for a post.
+
+    News is keyed on title alone; jobs and internships on title + link.
+    """
+    key = normalize_title(title)
+    if link:
+        key = f"{key}\n{normalize_url(link)}"
+    return hashlib.md5(key.encode("utf-8")).hexdigest()
+
+
+def existing_ids(db, collection: str, doc_ids: Iterable[str]) -> Set[str]:
+    """
+    Returns which of `doc_ids` already exist, using multi-document gets
+    instead of one query per candidate.
+    """
+    ids = list(dict.fromkeys(doc_ids))
+    found = set()
+    col = db.collection(collection)
+    for start in range(0, len(ids), LOOKUP_CHUNK_SIZE):
+        refs = [col.document(doc_id) for doc_id in ids[start:start + LOOKUP_CHUNK_SIZE]]
+        with timed("firestore.get_all", collection):
+            for snap in db.get_all(refs):
+                if snap.exists:
+                    found.add(snap.id)
+    return found
+
+
+def legacy_titles_active(now: Optional[datetime] = None) -> bool:
+    """
+    Whether documents with pre-content-ID IDs may still be in retention.
+    """
+    if not DEDUP_LEGACY_UNTIL:
+        return False
+    try:
+        until = datetime.fromisoformat(DEDUP_LEGACY_UNTIL)
+    except ValueError:
+        print(f"⚠️ Ignoring invalid DEDUP_LEGACY_UNTIL: {DEDUP_LEGACY_UNTIL}")
+        return False
+    if until.tzinfo is not None:
+        until = until.astimezone(timezone.utc).replace(tzinfo=None)
+    return (now or datetime.utcnow()) < until
+
+
+def existing_titles(db, collection: str, candidates: List[Tuple[str, Dict[str, str]]], key_on_link: bool = True) -> Set[str]:
+    """
+    Returns the IDs of candidates that match a stored document by title
+    (and normalized link when `key_on_link`), whatever that document's ID.
+    """
+    by_title: Dict[str, List[Tuple[str, Dict[str, str]]]] = {}
+    for doc_id, post in candidates:
+        by_title.setdefault(post.get("title", "").strip(), []).append((doc_id, post))
+    titles = list(by_title)
+    link_field = LINK_FIELDS.get(collection, "link")
+    found = set()
+    col = db.collection(collection)
+    for start in range(0, len(titles), TITLE_CHUNK_SIZE):
+        with timed("firestore.query", collection):
+            snaps = list(col.where("title", "in", titles[start:start + TITLE_CHUNK_SIZE]).stream())
+        for snap in snaps:
+            data = snap.to_dict() or {}
+            for doc_id, post in by_title.get(data.get("title", ""), []):
+                if not key_on_link or normalize_url(data.get(link_field, "")) == normalize_url(post.get("link", "")):
+                    found.add(doc_id)
+    return found
+
+
+def filter_new_posts(db, collection: str, posts: List[Dict[str, str]], key_on_link: bool = True) -> List[Tuple[str, Dict[str, str]]]:
+    """
+    Drops posts that already exist in `collection` or repeat within the batch.
+
+    Args:
+        db: Firestore client
+        collection (str): Target collection
+        posts (list): Parsed posts with 'title' and 'link'
+        key_on_link (bool): Include the link in the document ID
+
+    Returns:
+        list: (doc_id, post) pairs for the posts that should be written
+    """
+    candidates = []
+    seen = set()
+    for post in posts:
+        title = post.get("title", "").strip()
+        link = post.get("link", "").strip()
+        if not title or not link:
+            continue
+        doc_id = content_id(title, link if key_on_link else "")
+        if doc_id in seen:
+            print(f"⚠️ Skipping duplicate in batch: {title}")
+            continue
+        seen.add(doc_id)
+        candidates.append((doc_id, post))
+
+    if not candidates:
+        return []
+
+    existing = existing_ids(db, collection, [doc_id for doc_id, _ in candidates])
+    if legacy_titles_active():
+        missing = [(doc_id, post) for doc_id, post in candidates if doc_id not in existing]
+        if missing:
+            existing |= existing_titles(db, collection, missing, key_on_link)
+    for doc_id, post in candidates:
+        if doc_id in existing:
+            print(f"⚠️ Skipping duplicate: {post.get('title', '').strip()}")
+    return [(doc_id, post) for doc_id, post in candidates if doc_id not in existing]
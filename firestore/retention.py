@@ -0,0 +1,186 @@
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional
+from utils.metrics import timed
+
+# 🗓️ Days a document is kept, per collection. Override with
+# RETENTION_<COLLECTION>_DAYS, e.g. RETENTION_NEWS_ARTICLES_DAYS=3.
+RETENTION_DAYS = {
+    "news_articles": 2,
+    "internships_jobs": 2,
+    "messages": 1,
+}
+
+# Collections under chat rooms are purged with one collection-group query.
+# A collection-group range query on a field needs a single-field index
+# exemption with collection-group scope enabled (messages.timestamp).
+GROUP_COLLECTIONS = {"messages"}
+
+# Server-written documents carry expireAt; `timestamp` catches documents
+# written without it (earlier ingests). Chat messages are written by
+# clients and never have expireAt, so group collections only use `timestamp`.
+EXPIRY_FIELD = "expireAt"
+FALLBACK_FIELD = "timestamp"
+
+CHECKPOINT_COLLECTION = "retention_checkpoints"
+
+# Firestore rejects batches with more than 500 writes.
+RETENTION_BATCH_SIZE = min(int(os.getenv("RETENTION_BATCH_SIZE", "400")), 500)
+RETENTION_MAX_DELETES = int(os.getenv("RETENTION_MAX_DELETES", "5000"))
+
+
+def retention_days(collection: str) -> Optional[float]:
+    override = os.getenv(f"RETENTION_{collection.upper()}_DAYS")
+    if override:
+        return float(override)
+    return RETENTION_DAYS.get(collection)
+
+
+def expire_at(collection: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    When a document written now to `collection` expires, or None if the
+    collection has no retention window.
+    """
+    days = retention_days(collection)
+    if days is None:
+        return None
+    return (now or datetime.utcnow()) + timedelta(days=days)
+
+
+def stamp_expiry(collection: str, data: Dict, now: Optional[datetime] = None) -> Dict:
+    """
+    Adds expireAt to a document about to be written, if it has none yet.
+    """
+    if EXPIRY_FIELD not in data:
+        expires = expire_at(collection, now)
+        if expires is not None:
+            data[EXPIRY_FIELD] = expires
+    return data
+
+
+class RetentionEngine:
+    """
+    Deletes expired documents in bulk batches.
+
+    Each (collection, field) pass walks the expired documents in field order
+    and saves the last deleted value in retention_checkpoints, so a run that
+    hits its delete budget resumes where it stopped instead of re-scanning
+    index entries it already cleared. A pass that reaches the end clears its
+    checkpoint so the next run starts from the beginning again.
+
+    `on_delete(collection, doc_ids)` is called after each committed batch.
+
+    Usage:
+        deleted = RetentionEngine().purge(["news_articles", "messages"])
+    """
+
+    def __init__(
+        self,
+        db=None,
+        batch_size: int = RETENTION_BATCH_SIZE,
+        max_deletes: int = RETENTION_MAX_DELETES,
+        on_delete: Optional[Callable[[str, List[str]], None]] = None,
+    ):
+        self._db = db
+        self.batch_size = max(1, min(batch_size, 500))
+        self.max_deletes = max_deletes
+        self.on_delete = on_delete
+
+    @property
+    def db(self):
+        if self._db is None:
+            from utils.firebase import get_db
+            self._db = get_db()
+        return self._db
+
+    def _query(self, collection: str):
+        if collection in GROUP_COLLECTIONS:
+            return self.db.collection_group(collection)
+        return self.db.collection(collection)
+
+    def _checkpoint_ref(self, collection: str, field: str):
+        return self.db.collection(CHECKPOINT_COLLECTION).document(f"{collection}.{field}")
+
+    def _load_checkpoint(self, collection: str, field: str):
+        snap = self._checkpoint_ref(collection, field).get()
+        data = snap.to_dict() if snap.exists else None
+        return (data or {}).get("after")
+
+    def _save_checkpoint(self, collection: str, field: str, after):
+        ref = self._checkpoint_ref(collection, field)
+        if after is None:
+            ref.delete()
+        else:
+            ref.set({"after": after, "updated_at": datetime.utcnow()})
+
+    def _cutoff(self, collection: str, field: str, now: datetime) -> Optional[datetime]:
+        if field == EXPIRY_FIELD:
+            return now
+        days = retention_days(collection)
+        return None if days is None else now - timedelta(days=days)
+
+    def purge_field(self, collection: str, field: str, budget: int, now: Optional[datetime] = None) -> int:
+        """
+        Deletes up to `budget` documents of `collection` whose `field` is
+        past its cutoff. Returns the number deleted.
+        """
+        cutoff = self._cutoff(collection, field, now or datetime.utcnow())
+        if cutoff is None or budget <= 0:
+            return 0
+
+        start = after = self._load_checkpoint(collection, field)
+        last = None
+        deleted = 0
+        exhausted = False
+        while deleted < budget:
+            page_size = min(self.batch_size, budget - deleted)
+            query = self._query(collection).where(field, "<", cutoff).order_by(field)
+            if last is not None:
+                query = query.start_after(last)
+            elif start is not None:
+                # Inclusive: documents sharing the checkpoint value may remain.
+                query = query.start_at({field: start})
+            docs = list(query.limit(page_size).stream())
+            if not docs:
+                exhausted = True
+                break
+
+            batch = self.db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            with timed("firestore.batch_delete", collection):
+                batch.commit()
+            if self.on_delete is not None:
+                self.on_delete(collection, [doc.id for doc in docs])
+            deleted += len(docs)
+            last = docs[-1]
+            after = last.get(field)
+            if len(docs) < page_size:
+                exhausted = True
+                break
+
+        if not (exhausted and start is None):
+            self._save_checkpoint(collection, field, None if exhausted else after)
+        return deleted
+
+    def purge(self, collections: Iterable[str], now: Optional[datetime] = None) -> Dict[str, int]:
+        """
+        Runs one bounded pass over each collection. Returns deletes per
+        collection; the run stops early once `max_deletes` is spent.
+        """
+        now = now or datetime.utcnow()
+        budget = self.max_deletes
+        results: Dict[str, int] = {}
+        for collection in collections:
+            count = 0
+            fields = (FALLBACK_FIELD,) if collection in GROUP_COLLECTIONS else (EXPIRY_FIELD, FALLBACK_FIELD)
+            for field in fields:
+                try:
+                    count += self.purge_field(collection, field, budget - count, now)
+                except Exception as e:
+                    print(f"❌ Retention pass on {collection}.{field} failed:", e)
+            budget -= count
+            results[collection] = count
+            if count:
+                print(f"🧹 Deleted {count} expired documents from {collection}")
+        return results
@@ -1,17 +1,12 @@
-import os
-import hashlib
 from datetime import datetime
-from google.cloud import firestore
-from google.oauth2 import service_account
+from typing import Dict, List, Optional
+from utils.firebase import get_db
+from firestore.writer import IngestWriter
+from firestore.dedup import content_id
+from firestore.retention import stamp_expiry
+from utils.keywords import extract_keywords
 
-# Load credentials from service account JSON
-service_account_path = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "serviceAccountKey.json")
-credentials = service_account.Credentials.from_service_account_file(service_account_path)
-
-# Initialize Firestore client with credentials
-db = firestore.Client(credentials=credentials)
-
-def upload_post(collection: str, title: str, description: str, link: str):
+def upload_post(collection: str, title: str, description: str, link: str, writer: Optional[IngestWriter] = None):
     """
     Uploads a post to the given Firestore collection with duplicate prevention.
 
@@ -20,20 +15,47 @@ def upload_post(collection: str, title: str, description: str, link: str):
         title (str): Title of the content
         description (str): Description/content body
         link (str): Source link (used in deduplication)
+        writer (IngestWriter): Optional shared writer; when given the post is
+            only queued and the caller is responsible for flushing it
 
     Returns:
         None
     """
-    doc_id = hashlib.md5(f"{title}-{link}".encode()).hexdigest()
-
-    doc_ref = db.collection(collection).document(doc_id)
-    doc_ref.set({
+    doc_id = content_id(title, link)
+    data = {
         "title": title,
         "description": description,
         "link": link,
         "is_saved": False,
         "is_seen": False,
+        "keywords": extract_keywords(title, description),
         "posted_on": datetime.utcnow()
-    })
+    }
+    stamp_expiry(collection, data, data["posted_on"])
 
-    print(f"[UPLOAD] ✅ Added to '{collection}': {title}")
+    if writer is not None:
+        writer.set(collection, data, doc_id=doc_id)
+        return
+
+    with IngestWriter(get_db()) as single:
+        single.set(collection, data, doc_id=doc_id)
+    if single.summary()["written"]:
+        print(f"[UPLOAD] ✅ Added to '{collection}': {title}")
+
+def upload_posts(collection: str, posts: List[Dict[str, str]]) -> Dict:
+    """
+    Uploads many posts to one collection through a single batched writer.
+
+    Args:
+        collection (str): Firestore collection name
+        posts (list): Parsed posts with 'title', 'description' and 'link'
+
+    Returns:
+        dict: Writer summary with 'written', 'failed' and per-item 'results'
+    """
+    with IngestWriter(get_db()) as writer:
+        for post in posts:
+            upload_post(collection, post.get("title", ""), post.get("description", ""), post.get("link", ""), writer=writer)
+    summary = writer.summary()
+    print(f"[UPLOAD] ✅ Added {summary['written']} to '{collection}' ({summary['failed']} failed)")
+    return summary
@@ -0,0 +1,142 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+from utils.metrics import timed
+
+# Firestore rejects batches with more than 500 writes.
+MAX_BATCH_SIZE = 500
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", str(MAX_BATCH_SIZE)))
+INGEST_MAX_IN_FLIGHT = int(os.getenv("INGEST_MAX_IN_FLIGHT", "4"))
+INGEST_ITEM_RETRIES = int(os.getenv("INGEST_ITEM_RETRIES", "2"))
+
+
+class IngestWriter:
+    """
+    Buffers document writes and commits them as Firestore batches.
+
+    Full batches are committed in the background with at most `max_in_flight`
+    commits outstanding. If a batch commit fails, each of its items is retried
+    on its own so one bad document can't sink the rest.
+
+    Usage:
+        with IngestWriter(db) as writer:
+            writer.set("news_articles", {...})
+        print(writer.summary())
+    """
+
+    def __init__(
+        self,
+        db,
+        batch_size: int = INGEST_BATCH_SIZE,
+        max_in_flight: int = INGEST_MAX_IN_FLIGHT,
+        item_retries: int = INGEST_ITEM_RETRIES,
+    ):
+        self.db = db
+        self.batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+        self.item_retries = max(0, item_retries)
+        self._buffer: List[Dict[str, Any]] = []
+        self._results: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max(1, max_in_flight))
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_in_flight), thread_name_prefix="ingest")
+        self._futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def set(self, collection: str, data: Dict[str, Any], doc_id: Optional[str] = None) -> str:
+        """
+        Queues a document write and returns its document ID.
+        """
+        if doc_id:
+            ref = self.db.collection(collection).document(doc_id)
+        else:
+            ref = self.db.collection(collection).document()
+        self._buffer.append({"collection": collection, "ref": ref, "data": data})
+        if len(self._buffer) >= self.batch_size:
+            self._submit()
+        return ref.id
+
+    def flush(self) -> List[Dict[str, Any]]:
+        """
+        Commits everything buffered so far and waits for in-flight batches.
+        """
+        if self._buffer:
+            self._submit()
+        futures, self._futures = self._futures, []
+        for future in futures:
+            future.result()
+        return self.results()
+
+    def close(self) -> List[Dict[str, Any]]:
+        try:
+            return self.flush()
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def results(self) -> List[Dict[str, Any]]:
+        """
+        Per-item results: {"collection", "doc_id", "ok", "error"}.
+        """
+        with self._lock:
+            return list(self._results)
+
+    def summary(self) -> Dict[str, Any]:
+        results = self.results()
+        written = sum(1 for r in results if r["ok"])
+        return {
+            "written": written,
+            "failed": len(results) - written,
+            "results": results,
+        }
+
+    def _submit(self):
+        items, self._buffer = self._buffer, []
+        self._slots.acquire()
+        self._futures.append(self._executor.submit(self._commit, items))
+
+    def _commit(self, items: List[Dict[str, Any]]):
+        try:
+            with timed("firestore.batch_commit", items[0]["collection"]):
+                batch = self.db.batch()
+                for item in items:
+                    batch.set(item["ref"], item["data"])
+                batch.commit()
+            self._record(items, None)
+        except Exception as e:
+            print(f"⚠️ Batch commit of {len(items)} docs failed, retrying individually: {e}")
+            for item in items:
+                self._commit_one(item)
+        finally:
+            self._slots.release()
+
+    def _commit_one(self, item: Dict[str, Any]):
+        error = None
+        for attempt in range(self.item_retries + 1):
+            try:
+                with timed("firestore.set", item["collection"]):
+                    item["ref"].set(item["data"])
+                error = None
+                break
+            except Exception as e:
+                error = e
+                time.sleep(min(0.2 * (2 ** attempt), 2.0))
+        if error is not None:
+            print(f"❌ Failed to write {item['collection']}/{item['ref'].id}: {error}")
+        self._record([item], error)
+
+    def _record(self, items: List[Dict[str, Any]], error: Optional[Exception]):
+        with self._lock:
+            for item in items:
+                self._results.append({
+                    "collection": item["collection"],
+                    "doc_id": item["ref"].id,
+                    "ok": error is None,
+                    "error": str(error) if error is not None else None,
+                })
@@ -1,17 +1,30 @@
-from fastapi import FastAPI, Body
+from fastapi import FastAPI, Body, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from perplexity.client import fetch_perplexity_response
-from utils.parser import parse_perplexity_response
-from firebase_admin import credentials, firestore, initialize_app, messaging
-from datetime import datetime, timedelta
-from apscheduler.schedulers.background import BackgroundScheduler
-from urllib.parse import urlparse
+from perplexity.client import PERPLEXITY_MAX_CONCURRENCY, fetch_combined_response, fetch_perplexity_responses, stream_perplexity_response
+from utils.parser import category_json_schema, iter_posts, parse_combined_response, parse_perplexity_response
+from firestore.writer import IngestWriter
+from firestore.dedup import filter_new_posts
+from firestore.retention import RetentionEngine, expire_at
+from utils.platforms import filter_unique_platform_posts
+from feed_routes import router as feed_router, feeds_for_collection, refresh_feeds
+from chat_routes import router as chat_router
+from search_routes import router as search_router
+from notification_routes import router as notification_router
+from utils.scheduler import LeaderScheduler, make_lease
+from utils.jobs import JobRunner, NullJob
+from utils.planner import REFRESH_MIN_MINUTES, RefreshPlanner
+from utils.metrics import finish_request_timings, render_prometheus, start_request_timings
+from utils.firebase import get_db, send_push_notification
+from utils.fcm import send_topic_notification
+from utils.keywords import extract_keywords
+from utils.links import iter_valid_post_links
+from utils.search_index import search_index
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Iterable, Optional
 import atexit
-
-# 🔐 Firebase Init
-cred = credentials.Certificate("serviceAccountKey.json")
-initialize_app(cred)
-db = firestore.client()
+import os
 
 # 🚀 FastAPI App
 app = FastAPI()
@@ -25,17 +38,30 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# 🔔 Push Notifications
-def send_push_notification(token: str, title: str, body: str):
-    message = messaging.Message(
-        notification=messaging.Notification(title=title, body=body),
-        token=token,
-    )
-    try:
-        response = messaging.send(message)
-        print("✅ Notification sent:", response)
-    except Exception as e:
-        print("❌ Notification error:", e)
+# 📰 Cached read API
+app.include_router(feed_router)
+
+# 💬 Chat notifications
+app.include_router(chat_router)
+
+# 🔎 Keyword search over the in-memory index
+app.include_router(search_router)
+
+# 📣 Topic subscriptions for content notifications
+app.include_router(notification_router)
+
+# ⏱️ Per-request Server-Timing header (METRICS_TIMING_HEADERS=1)
+if os.getenv("METRICS_TIMING_HEADERS", "0") == "1":
+    @app.middleware("http")
+    async def server_timing(request: Request, call_next):
+        token = start_request_timings()
+        try:
+            response = await call_next(request)
+        finally:
+            header = finish_request_timings(token)
+        if header:
+            response.headers["Server-Timing"] = header
+        return response
 
 @app.get("/")
 def root():
@@ -45,167 +71,236 @@ def root():
 def ping():
     return {"message": "pong"}
 
+@app.get("/metrics")
+def metrics():
+    return Response(content=render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.post("/test-notification")
 def test_notification(token: str = Body(...)):
     send_push_notification(token, "Test Push", "You got this from Askarg backend 🚀")
     return {"message": "Test notification sent"}
 
-# 🔍 Platform extraction for backend filtering
-def extract_platform_from_link(url):
-    domain = urlparse(url).netloc.lower()
-    if "linkedin.com" in domain:
-        return "LinkedIn"
-    elif "indeed.com" in domain:
-        return "Indeed"
-    elif "internshala.com" in domain:
-        return "Internshala"
-    elif "angel.co" in domain or "wellfound.com" in domain:
-        return "AngelList"
-    elif "amazon.jobs" in domain:
-        return "Amazon"
-    elif "microsoft.com" in domain:
-        return "Microsoft"
-    elif "cognizant.com" in domain:
-        return "Cognizant"
-    elif "ibm.com" in domain:
-        return "IBM"
-    elif "google.com" in domain:
-        return "Google"
-    elif "hackerearth.com" in domain:
-        return "HackerEarth"
-    elif "radixweb.com" in domain:
-        return "Radixweb"
-    elif "github.com" in domain:
-        return "GitHub"
-    else:
-        return "Other"
-
-def filter_unique_platform_posts(posts):
-    seen_platforms = set()
-    filtered = []
-    for post in posts:
-        link = post.get("link", "")
-        platform = extract_platform_from_link(link)
-        if platform not in seen_platforms and platform != "Other":
-            seen_platforms.add(platform)
-            filtered.append(post)
-        if len(filtered) == 5:
-            break
-    return filtered
+# 🧠 Category prompts
+PROMPTS = {
+    "news_articles": (
+        "Generate exactly 5 very recent technology news stories, published within the last 5 days, strictly relevant to students, early-career developers, and tech learners. "
+        "Focus on real-world innovation and learning impact, especially in rural (Tier 2/3) and metro areas. Avoid any repeated, outdated, or irrelevant content. "
+        "Return only the output as a strict JSON array of 5 objects, where each object must contain: "
+        "\"title\": short and clear headline (string), "
+        "\"summary\": max 60 words, student-friendly, plain English, no jargon, "
+        "\"link\": valid HTTPS URL from a real, trustworthy source. "
+        "Use only the most trusted international and Indian sources such as: WSJ, TechCrunch, EdSurge, Times of India, Indian Express, The Hindu, BBC, The Verge, Reuters, TIME, EdTechReview, HolonIQ, Nikkei Asia, Microsoft News, EdTech Hub, EdSurge, UNESCO, etc. "
+        "Only cover these categories: Advanced AI in Education, Must-Have Tech Gadgets, Digital Classroom Innovations, Major Tech Industry Shifts, Internship & Job Opportunities, AI Tools, Bootcamps, Campus Entrepreneurship, Cybersecurity for Students, Scholarships, Green Tech in Education, Women in STEM, Regional Language EdTech, and Student Empowerment in Tier 2/3. "
+        "Do not include news older than 5 days, AI-generated content, or repeated stories. Output must be clean JSON array. No comments or notes."
+    ),
+    "jobs": (
+        "Fetch exactly 5 currently active, verified, and relevant job listings for freshers, recent graduates, or early-career software professionals in India. "
+        "Include remote, hybrid, or onsite roles. Listings must be posted within the last 3 days only and should not be duplicated. "
+        "Each job must be from a different platform. "
+        "Allowed platforms: LinkedIn Jobs, Indeed India, Internshala, AngelList (Wellfound), Microsoft Careers, Amazon Jobs, Google Careers, Radixweb, Cognizant, Infosys, IBM, GitHub Jobs, EdTech platforms. "
+        "If fewer than 5 unique platforms have results, allow duplicates from the most recent and relevant platforms to fill the list. "
+        "Each job must include the following fields: "
+        "- \"title\": Job title (short and clear) "
+        "- \"company\": Employer name "
+        "- \"location\": City, Remote, or Hybrid "
+        "- \"link\": A valid, direct job application or listing URL "
+        "Respond only with a clean JSON array of 5 job objects. Do not include any text, notes, summaries, or explanations outside the JSON."
+    ),
+    "internships": (
+        "Fetch up to 5 currently active and verified internship opportunities in India for students and fresh graduates in software-related roles. "
+        "These internships must be suitable for learners with little to no professional experience and should preferably mention that they offer a stipend if available. "
+        "Domains must include Web Development, Mobile App Development (Android/iOS), AI/ML, Data Science, Cybersecurity, Cloud Computing, or QA/Testing. "
+        "Only return roles from the last 7 days — no expired, duplicated, or irrelevant listings. "
+        "Prefer internships from different platforms in this list: Internshala, AngelList Talent (angel.co/jobs), LinkedIn Internships, Turing, Microsoft Careers, Google Careers, IBM Careers, Cognizant Careers, HackerEarth Jobs, leading EdTech platforms. "
+        "If fewer than 5 unique platforms have results, allow duplicates from the most recent and relevant platforms to fill the list. "
+        "Return the output strictly as a clean JSON array of up to 5 internship objects, where each object contains only: "
+        "\"title\" (string), \"company\" (string), \"location\" (Remote/City), and \"link\" (valid HTTPS apply URL). "
+        "Do not include any extra information, summaries, explanations, headings, or formatting outside the JSON array."
+    )
+}
 
-@app.api_route("/fetch-and-upload", methods=["GET", "POST"])
-def fetch_and_upload(token: str = Body(default=None)):
-    prompts = {
-        "news_articles": (
-            "Generate exactly 5 very recent technology news stories, published within the last 5 days, strictly relevant to students, early-career developers, and tech learners. "
-            "Focus on real-world innovation and learning impact, especially in rural (Tier 2/3) and metro areas. Avoid any repeated, outdated, or irrelevant content. "
-            "Return only the output as a strict JSON array of 5 objects, where each object must contain: "
-            "\"title\": short and clear headline (string), "
-            "\"summary\": max 60 words, student-friendly, plain English, no jargon, "
-            "\"link\": valid HTTPS URL from a real, trustworthy source. "
-            "Use only the most trusted international and Indian sources such as: WSJ, TechCrunch, EdSurge, Times of India, Indian Express, The Hindu, BBC, The Verge, Reuters, TIME, EdTechReview, HolonIQ, Nikkei Asia, Microsoft News, EdTech Hub, EdSurge, UNESCO, etc. "
-            "Only cover these categories: Advanced AI in Education, Must-Have Tech Gadgets, Digital Classroom Innovations, Major Tech Industry Shifts, Internship & Job Opportunities, AI Tools, Bootcamps, Campus Entrepreneurship, Cybersecurity for Students, Scholarships, Green Tech in Education, Women in STEM, Regional Language EdTech, and Student Empowerment in Tier 2/3. "
-            "Do not include news older than 5 days, AI-generated content, or repeated stories. Output must be clean JSON array. No comments or notes."
-        ),
-        "jobs": (
-            "Fetch exactly 5 currently active, verified, and relevant job listings for freshers, recent graduates, or early-career software professionals in India. "
-            "Include remote, hybrid, or onsite roles. Listings must be posted within the last 3 days only and should not be duplicated. "
-            "Each job must be from a different platform. "
-            "Allowed platforms: LinkedIn Jobs, Indeed India, Internshala, AngelList (Wellfound), Microsoft Careers, Amazon Jobs, Google Careers, Radixweb, Cognizant, Infosys, IBM, GitHub Jobs, EdTech platforms. "
-            "If fewer than 5 unique platforms have results, allow duplicates from the most recent and relevant platforms to fill the list. "
-            "Each job must include the following fields: "
-            "- \"title\": Job title (short and clear) "
-            "- \"company\": Employer name "
-            "- \"location\": City, Remote, or Hybrid "
-            "- \"link\": A valid, direct job application or listing URL "
-            "Respond only with a clean JSON array of 5 job objects. Do not include any text, notes, summaries, or explanations outside the JSON."
-        ),
-        "internships": (
-            "Fetch up to 5 currently active and verified internship opportunities in India for students and fresh graduates in software-related roles. "
-            "These internships must be suitable for learners with little to no professional experience and should preferably mention that they offer a stipend if available. "
-            "Domains must include Web Development, Mobile App Development (Android/iOS), AI/ML, Data Science, Cybersecurity, Cloud Computing, or QA/Testing. "
-            "Only return roles from the last 7 days — no expired, duplicated, or irrelevant listings. "
-            "Prefer internships from different platforms in this list: Internshala, AngelList Talent (angel.co/jobs), LinkedIn Internships, Turing, Microsoft Careers, Google Careers, IBM Careers, Cognizant Careers, HackerEarth Jobs, leading EdTech platforms. "
-            "If fewer than 5 unique platforms have results, allow duplicates from the most recent and relevant platforms to fill the list. "
-            "Return the output strictly as a clean JSON array of up to 5 internship objects, where each object contains only: "
-            "\"title\" (string), \"company\" (string), \"location\" (Remote/City), and \"link\" (valid HTTPS apply URL). "
-            "Do not include any extra information, summaries, explanations, headings, or formatting outside the JSON array."
-        )
-    }
+# 🗂️ Firestore collection each category is written to
+TARGET_COLLECTIONS = {
+    "news_articles": "news_articles",
+    "jobs": "internships_jobs",
+    "internships": "internships_jobs",
+}
 
-    notifications_sent = []
+# 📡 Stream completions and parse posts as they arrive (PERPLEXITY_STREAM=1)
+PERPLEXITY_STREAM = os.getenv("PERPLEXITY_STREAM", "0") == "1"
+# 📦 Ask for every category in one structured-output request; categories the
+# combined answer gets wrong are re-fetched on their own (PERPLEXITY_COMBINED=0 to disable)
+PERPLEXITY_COMBINED = os.getenv("PERPLEXITY_COMBINED", "1") == "1"
+
+def ingest_category(collection: str, posts, job=None) -> int:
+    job = job or NullJob()
+    counts = {"parsed": 0, "validated": 0}
 
-    for collection, prompt in prompts.items():
-        print(f"[FETCH] {collection}")
-        content = fetch_perplexity_response(prompt)
-        if not content:
-            print(f"❌ Failed to fetch {collection}")
-            continue
+    def count(items, field):
+        for item in items:
+            counts[field] += 1
+            yield item
 
-        posts = parse_perplexity_response(content)
+    # 🔗 Drop dead links and resolve redirects before dedup keys on the link.
+    # Posts stay lazy: links are checked as streamed posts arrive, and the
+    # platform filter stops reading once it has enough unique platforms.
+    posts = count(iter_valid_post_links(count(posts, "parsed")), "validated")
+    if collection in ["jobs", "internships"]:
+        posts = filter_unique_platform_posts(posts)
+    else:
+        posts = list(posts)
 
-        if collection in ["jobs", "internships"]:
-            posts = filter_unique_platform_posts(posts)
+    print(f"✅ Parsed {counts['parsed']} entries for {collection}")
+    job.update(collection, fetched=True, **counts)
 
-        print(f"✅ Parsed {len(posts)} entries for {collection}")
-        new_count = 0
+    # 🔎 One batched existence lookup per category instead of a query per post
+    target = TARGET_COLLECTIONS[collection]
+    db = get_db()
+    fresh = filter_new_posts(db, target, posts, key_on_link=collection != "news_articles")
+    job.update(collection, deduplicated=len(fresh))
 
-        for post in posts:
+    queued = {}
+    with IngestWriter(db) as writer:
+        for doc_id, post in fresh:
             title = post.get("title", "").strip()
             link = post.get("link", "").strip()
-            if not title or not link:
-                continue
-
             timestamp = datetime.utcnow()
 
             if collection == "news_articles":
-                exists = db.collection("news_articles").where("title", "==", title).get()
-                if exists:
-                    print(f"⚠️ Skipping duplicate news: {title}")
-                    continue
-
-                db.collection("news_articles").document().set({
+                description = post.get("summary", post.get("description", ""))
+                data = {
                     "title": title,
-                    "summary": post.get("summary", post.get("description", "")),
+                    "summary": description,
                     "fullContent": "",
                     "source": "",
                     "url": link,
                     "timestamp": timestamp,
-                    "keywords": []
-                })
+                    "expireAt": expire_at(target, timestamp),
+                    "keywords": extract_keywords(title, description)
+                }
             else:
-                exists = db.collection("internships_jobs").where("title", "==", title).where("link", "==", link).get()
-                if exists:
-                    print(f"⚠️ Skipping duplicate job/internship: {title}")
-                    continue
-
-                db.collection("internships_jobs").document().set({
+                company = post.get("company", "Not specified")
+                location = post.get("location", "Not specified")
+                data = {
                     "title": title,
-                    "company": post.get("company", "Not specified"),
-                    "location": post.get("location", "Not specified"),
+                    "company": company,
+                    "location": location,
                     "type": "Job" if collection == "jobs" else "Internship",
                     "link": link,
                     "timestamp": timestamp,
-                    "keywords": []
-                })
-
-            new_count += 1
-
-        if new_count > 0 and token:
-            notif_title = {
-                "news_articles": "New Tech News 🔔",
-                "jobs": "Jobs Updated 💼",
-                "internships": "Internships Updated 🎓"
-            }[collection]
-            notif_body = {
-                "news_articles": "New articles have been added.",
-                "jobs": "New job posts available.",
-                "internships": "Fresh internships just added."
-            }[collection]
-            send_push_notification(token, notif_title, notif_body)
-            notifications_sent.append(collection)
-
-        print(f"✅ Uploaded {new_count} new items to {collection}")
+                    "expireAt": expire_at(target, timestamp),
+                    "keywords": extract_keywords(title, post.get("description"), company, location)
+                }
+            queued[writer.set(target, data, doc_id=doc_id)] = data
+
+    summary = writer.summary()
+    search_index.add_many(target, ((r["doc_id"], queued[r["doc_id"]]) for r in summary["results"] if r["ok"]))
+    new_count = summary["written"]
+    job.update(collection, written=new_count)
+    if summary["failed"]:
+        print(f"❌ {summary['failed']} writes failed for {collection}")
+    print(f"✅ Uploaded {new_count} new items to {collection}")
+    return new_count
+
+NOTIFICATION_TITLES = {
+    "news_articles": "New Tech News 🔔",
+    "jobs": "Jobs Updated 💼",
+    "internships": "Internships Updated 🎓"
+}
+NOTIFICATION_BODIES = {
+    "news_articles": "New articles have been added.",
+    "jobs": "New job posts available.",
+    "internships": "Fresh internships just added."
+}
+# 📣 Every refresh with new items is broadcast to the category's FCM topic
+# (clients subscribe via /notifications/subscriptions); NOTIFY_TOPICS=0 disables.
+NOTIFICATION_TOPICS = {
+    "news_articles": "news",
+    "jobs": "jobs",
+    "internships": "internships"
+}
+NOTIFY_TOPICS = os.getenv("NOTIFY_TOPICS", "1") == "1"
+
+def refresh_categories(categories: Optional[Iterable[str]] = None, token: Optional[str] = None, job=None):
+    job = job or NullJob(token)
+    prompts = {c: PROMPTS[c] for c in (categories or PROMPTS) if c in PROMPTS}
+    notifications_sent = []
+    changed_feeds = set()
+    # Refreshes only run for categories the planner found due (or forced), so
+    # Perplexity is always asked live: a cached or stale answer would ingest
+    # old results and feed the planner a yield that isn't real.
+
+    def notify(collection, new_count):
+        job.update(collection, state="done")
+        planner.record(collection, new_count)
+        if new_count > 0:
+            changed_feeds.update(feeds_for_collection(TARGET_COLLECTIONS[collection]))
+            topic = NOTIFICATION_TOPICS[collection]
+            title, body = NOTIFICATION_TITLES[collection], NOTIFICATION_BODIES[collection]
+            # Same collapse key for the broadcast and direct sends, so a
+            # requesting device that is also subscribed shows one notification.
+            collapse_key = f"content_{topic}"
+            broadcast = NOTIFY_TOPICS and send_topic_notification(
+                topic, title, body, data={"category": collection}, collapse_key=collapse_key
+            ) is not None
+            tokens = job.notify_tokens()
+            for device_token in tokens:
+                send_push_notification(device_token, title, body, collapse_key=collapse_key)
+            if tokens:
+                job.update(collection, notified=len(tokens))
+            if broadcast:
+                job.update(collection, broadcast=topic)
+            if tokens or broadcast:
+                notifications_sent.append(collection)
+
+    def failed(collection):
+        print(f"❌ Failed to fetch {collection}")
+        job.update(collection, state="failed")
+        planner.record(collection, ok=False)
+
+    for collection in prompts:
+        job.update(collection, state="fetching")
+
+    print(f"[FETCH] {', '.join(prompts)}")
+    if PERPLEXITY_STREAM:
+        # ⚡ One streaming request per category; jobs/internships stop reading
+        # as soon as enough unique platforms have been seen.
+        def stream_category(collection):
+            chunks = stream_perplexity_response(prompts[collection], category=collection, use_cache=False)
+            return ingest_category(collection, iter_posts(chunks), job)
+
+        with ThreadPoolExecutor(max_workers=max(1, min(PERPLEXITY_MAX_CONCURRENCY, len(prompts)))) as executor:
+            futures = {executor.submit(stream_category, c): c for c in prompts}
+            for future in as_completed(futures):
+                collection = futures[future]
+                try:
+                    notify(collection, future.result())
+                except Exception as e:
+                    print(f"❌ {collection}: {e}")
+                    failed(collection)
+    else:
+        remaining = dict(prompts)
+        if PERPLEXITY_COMBINED and len(prompts) > 1:
+            content = fetch_combined_response(prompts, category_json_schema(prompts), use_cache=False)
+            for collection, posts in parse_combined_response(content, prompts).items():
+                if posts is None:
+                    continue
+                del remaining[collection]
+                notify(collection, ingest_category(collection, posts, job))
+            if remaining:
+                print(f"[FETCH] Falling back to separate requests for {', '.join(remaining)}")
+
+        # ⚡ All categories are fetched concurrently; each one is parsed and
+        # uploaded as soon as its response arrives.
+        for collection, content in fetch_perplexity_responses(remaining, use_cache=False):
+            if not content:
+                failed(collection)
+                continue
+
+            notify(collection, ingest_category(collection, parse_perplexity_response(content), job))
+
+    if changed_feeds:
+        refresh_feeds(*changed_feeds)
 
     return {
         "status": "success",
@@ -213,54 +308,119 @@ def fetch_and_upload(token: str = Body(default=None)):
         "collections": list(prompts.keys())
     }
 
-# 🧹 Delete Old Data
+# 📈 Per-category refresh intervals adapted to yield (utils/planner.py)
+planner = RefreshPlanner()
+
+# 🧵 Refresh jobs: shared by the HTTP route and the scheduler. A request for
+# categories that are already being refreshed attaches to the running job.
+refresh_runner = JobRunner(lambda job: refresh_categories(job.categories, job=job))
+
+@app.api_route("/fetch-and-upload", methods=["GET", "POST"])
+def fetch_and_upload(token: str = Body(default=None), force: bool = Query(False)):
+    # Categories refreshed within their current interval are skipped unless ?force=true
+    due, fresh = planner.plan(PROMPTS, force=force)
+    if not due:
+        return {"status": "fresh", "job_id": None, "skipped": fresh}
+
+    job, attached = refresh_runner.submit(due, token, force)
+    primary = job or attached[0]
+    return JSONResponse(status_code=202, content={
+        "status": primary.status,
+        "job_id": primary.id,
+        "attached": job is None,
+        "related_jobs": [j.id for j in attached if j is not primary],
+        "skipped": fresh,
+    })
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = refresh_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+# 🧹 Retention: windows per collection live in firestore/retention.py
+# (RETENTION_<COLLECTION>_DAYS); each run deletes in batches up to
+# RETENTION_MAX_DELETES documents and resumes from its checkpoint next time.
 def delete_old_content():
+    deleted = {}
     try:
-        cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=1), datetime.min.time())
-        news_deleted = db.collection("news_articles").where("timestamp", "<", cutoff).stream()
-        for doc in news_deleted:
-            doc.reference.delete()
-            print(f"🧹 Deleted old news: {doc.id}")
-
-        jobs_deleted = db.collection("internships_jobs").where("timestamp", "<", cutoff).stream()
-        for doc in jobs_deleted:
-            doc.reference.delete()
-            print(f"🧹 Deleted old job/internship: {doc.id}")
+        deleted = RetentionEngine(on_delete=search_index.remove).purge(["news_articles", "internships_jobs"])
     except Exception as e:
         print("❌ Error deleting old content:", e)
+    finally:
+        if any(deleted.values()):
+            refresh_feeds()
+    return deleted
 
 def delete_old_chat_messages():
     try:
-        cutoff = datetime.combine(datetime.utcnow().date() - timedelta(days=1), datetime.min.time())
-        rooms = db.collection("chat_rooms").stream()
-        for room in rooms:
-            messages = (
-                db.collection("chat_rooms")
-                .document(room.id)
-                .collection("messages")
-                .where("timestamp", "<", cutoff)
-                .stream()
-            )
-            for msg in messages:
-                msg.reference.delete()
-                print(f"🧹 Deleted old message in room {room.id}: {msg.id}")
+        return RetentionEngine().purge(["messages"])
     except Exception as e:
         print("❌ Error deleting old messages:", e)
+        return {}
 
 # 🔁 Scheduler
-def auto_fetch():
-    print("⏰ Running scheduled fetch-and-upload (no token)...")
+# Every worker registers the jobs, but each run is guarded by a lease
+# (Firestore lock document, or SCHEDULER_LOCK=file for local runs) so only
+# one process executes it, and a run is skipped while the last one is going.
+def _minutes(name: str, default: float) -> float:
+    return float(os.getenv(f"SCHEDULE_{name.upper()}_MINUTES", default)) * 60
+
+# Content refresh ticks at the planner's shortest interval and only fetches
+# the categories that are due, all in one run. Per-category leases are shared
+# with scripts/fetch_and_upload.py so the two never refresh the same category.
+def scheduled_refresh():
+    due, fresh = planner.plan(PROMPTS)
+    if fresh:
+        print(f"⏭️ Still fresh: {', '.join(fresh)}")
+    leases = {}
+    for category in due:
+        lease = make_lease(f"fetch_{category}")
+        if lease.acquire(ttl=600):
+            leases[category] = lease
+        else:
+            print(f"⏭️ Skipping {category}: refresh already running elsewhere")
+    if not leases:
+        return
     try:
-        fetch_and_upload(token=None)
-        delete_old_content()
-        delete_old_chat_messages()
-    except Exception as e:
-        print("❌ Scheduler error:", e)
+        job, attached = refresh_runner.run(list(leases))
+    finally:
+        for lease in leases.values():
+            lease.release()
+    for j in ([job] if job else []) + attached:
+        if j.status == "failed":
+            raise RuntimeError(j.error)
+
+SCHEDULED_JOBS = {
+    "refresh_content": (scheduled_refresh, _minutes("refresh_content", REFRESH_MIN_MINUTES)),
+    "cleanup_content": (delete_old_content, _minutes("cleanup_content", 60)),
+    "cleanup_chat": (delete_old_chat_messages, _minutes("cleanup_chat", 60)),
+}
+
+scheduler = LeaderScheduler(jitter=float(os.getenv("SCHEDULER_JITTER_SECONDS", "30")))
+for job_name, (job_func, job_seconds) in SCHEDULED_JOBS.items():
+    scheduler.add_job(job_name, job_func, job_seconds)
+
+@app.on_event("startup")
+def start_scheduler():
+    if os.getenv("SCHEDULER_ENABLED", "1") == "1":
+        scheduler.start()
+
+@app.on_event("shutdown")
+def stop_scheduler():
+    scheduler.shutdown()
+    refresh_runner.shutdown()
+
+atexit.register(scheduler.shutdown)
+
+@app.get("/scheduler/status")
+def scheduler_status():
+    return scheduler.status()
 
-scheduler = BackgroundScheduler()
-scheduler.add_job(auto_fetch, 'interval', hours=1)
-scheduler.start()
-atexit.register(lambda: scheduler.shutdown())
+@app.get("/refresh/plan")
+def refresh_plan():
+    return planner.status(PROMPTS)
 
 # ✅ Manual Delete Route
 @app.get("/delete-old")
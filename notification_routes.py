@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Body, HTTPException
+from fastapi.concurrency import run_in_threadpool
+from utils.fcm import TOPICS, subscribe_tokens, unsubscribe_tokens
+
+router = APIRouter()
+
+SUBSCRIPTION_MAX_TOKENS = 10_000
+
+
+@router.post("/notifications/subscriptions")
+async def manage_subscriptions(payload: dict = Body(...)):
+    """
+    Subscribes (or unsubscribes) many device tokens to content topics in bulk.
+
+    Body: {"tokens": [...], "topics": ["news", "jobs", "internships"],
+           "action": "subscribe" | "unsubscribe"}; topics default to all.
+    Tokens FCM reports as unregistered are removed from user profiles.
+    """
+    tokens = payload.get("tokens") or []
+    topics = payload.get("topics") or list(TOPICS)
+    action = payload.get("action", "subscribe")
+
+    if not isinstance(tokens, list) or not all(isinstance(t, str) for t in tokens):
+        raise HTTPException(status_code=400, detail="tokens must be a list of strings")
+    if not tokens or len(tokens) > SUBSCRIPTION_MAX_TOKENS:
+        raise HTTPException(status_code=400, detail=f"Send between 1 and {SUBSCRIPTION_MAX_TOKENS} tokens")
+    if action not in ("subscribe", "unsubscribe"):
+        raise HTTPException(status_code=400, detail="action must be 'subscribe' or 'unsubscribe'")
+    unknown = [t for t in topics if t not in TOPICS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown topics: {', '.join(map(str, unknown))}")
+
+    manage = subscribe_tokens if action == "subscribe" else unsubscribe_tokens
+    results = {}
+    for topic in dict.fromkeys(topics):
+        results[topic] = await run_in_threadpool(manage, tokens, topic)
+    return {"action": action, "topics": results}
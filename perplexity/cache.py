@@ -0,0 +1,157 @@
+import os
+import time
+import sqlite3
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from utils.metrics import count_cache
+
+# Entries are (value, stored_at) where stored_at is a unix timestamp.
+Entry = Tuple[str, float]
+
+
+def cache_key(model: str, system_prompt: str, prompt: str, temperature: float, response_format: Optional[Dict] = None) -> str:
+    """
+    Hash of everything that determines a completion.
+    """
+    parts = [model, system_prompt, prompt, temperature]
+    if response_format:
+        parts.append(response_format)
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class MemoryBackend:
+    """
+    In-process LRU store.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._data: "OrderedDict[str, Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Entry]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, value: str, stored_at: float):
+        with self._lock:
+            self._data[key] = (value, stored_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SQLiteBackend:
+    """
+    On-disk store shared by every process pointing at the same file
+    (e.g. the web service and the cron worker on one host).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS perplexity_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, stored_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Entry]:
+        row = self._connect().execute(
+            "SELECT value, stored_at FROM perplexity_cache WHERE key = ?", (key,)
+        ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def set(self, key: str, value: str, stored_at: float):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO perplexity_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                (key, value, stored_at),
+            )
+
+    def delete(self, key: str):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM perplexity_cache WHERE key = ?", (key,))
+
+
+class ResponseCache:
+    """
+    TTL cache with stale-while-revalidate semantics on top of a backend.
+
+    lookup() returns (value, state) with state one of "fresh", "stale" or
+    "miss". A stale entry is still served while it is younger than
+    ttl + stale_ttl; the caller is expected to refresh it. Lookups and
+    stores are also counted in /metrics under cache="<name>".
+    """
+
+    def __init__(self, backend, name: str = "perplexity"):
+        self.backend = backend
+        self.name = name
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "stores": 0}
+
+    def lookup(self, key: str, ttl: float, stale_ttl: float = 0) -> Tuple[Optional[str], str]:
+        try:
+            entry = self.backend.get(key)
+        except Exception as e:
+            print(f"[CACHE] ⚠️ Lookup failed: {e}")
+            entry = None
+
+        state = "miss"
+        value = None
+        if entry is not None:
+            age = time.time() - entry[1]
+            if age <= ttl:
+                state, value = "fresh", entry[0]
+            elif age <= ttl + stale_ttl:
+                state, value = "stale", entry[0]
+
+        with self._lock:
+            self._stats[{"fresh": "hits", "stale": "stale_hits", "miss": "misses"}[state]] += 1
+        count_cache(self.name, {"fresh": "hit", "stale": "stale_hit", "miss": "miss"}[state])
+        return value, state
+
+    def store(self, key: str, value: str):
+        try:
+            self.backend.set(key, value, time.time())
+        except Exception as e:
+            print(f"[CACHE] ⚠️ Store failed: {e}")
+            return
+        with self._lock:
+            self._stats["stores"] += 1
+        count_cache(self.name, "store")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._stats)
+
+
+def build_backend(kind: Optional[str] = None, path: Optional[str] = None):
+    """
+    Creates the backend named by PERPLEXITY_CACHE_BACKEND ("memory", "sqlite" or "none").
+    """
+    kind = (kind or os.getenv("PERPLEXITY_CACHE_BACKEND", "memory")).lower()
+    if kind == "none":
+        return None
+    if kind == "sqlite":
+        return SQLiteBackend(path or os.getenv("PERPLEXITY_CACHE_PATH", ".perplexity_cache.sqlite3"))
+    return MemoryBackend(int(os.getenv("PERPLEXITY_CACHE_MAX_ENTRIES", "256")))
@@ -1,14 +1,176 @@
 import os
+import json
+import time
+import threading
 import requests
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError as FuturesTimeoutError
+from requests.adapters import HTTPAdapter
+from typing import Dict, Iterator, Optional, Tuple
+from perplexity.cache import ResponseCache, build_backend, cache_key
+from perplexity.resilience import CircuitBreaker, TokenBucket, backoff_delay, retry_after_seconds
+from utils.metrics import timed
 
 # ✅ Correct endpoint for pplx-* keys (no /v1)
-PERPLEXITY_API_URL = "https://api.perplexity.ai/chat/completions"
+PERPLEXITY_API_URL = os.getenv("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
 
-def fetch_perplexity_response(prompt: str) -> Optional[str]:
+# ⚙️ Tunables (override per deployment via env)
+PERPLEXITY_CONNECT_TIMEOUT = float(os.getenv("PERPLEXITY_CONNECT_TIMEOUT", "5"))
+PERPLEXITY_TIMEOUT = float(os.getenv("PERPLEXITY_TIMEOUT", "30"))
+PERPLEXITY_MAX_CONCURRENCY = int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", "3"))
+
+# 🛡️ Rate limiting, retries and circuit breaker
+PERPLEXITY_RATE_PER_SEC = float(os.getenv("PERPLEXITY_RATE_PER_SEC", "1"))
+PERPLEXITY_BURST = float(os.getenv("PERPLEXITY_BURST", "3"))
+PERPLEXITY_MAX_RETRIES = int(os.getenv("PERPLEXITY_MAX_RETRIES", "3"))
+PERPLEXITY_BACKOFF_BASE = float(os.getenv("PERPLEXITY_BACKOFF_BASE", "1"))
+PERPLEXITY_BACKOFF_MAX = float(os.getenv("PERPLEXITY_BACKOFF_MAX", "20"))
+PERPLEXITY_BREAKER_THRESHOLD = int(os.getenv("PERPLEXITY_BREAKER_THRESHOLD", "5"))
+PERPLEXITY_BREAKER_COOLDOWN = float(os.getenv("PERPLEXITY_BREAKER_COOLDOWN", "120"))
+RETRYABLE_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+PERPLEXITY_MODEL = "sonar-pro"
+PERPLEXITY_TEMPERATURE = 0.5
+SYSTEM_PROMPT = "You are Askarg AI Assistant helping students find tech news and jobs. Always respond in pure JSON format without explanations or markdown."
+
+# 🗃️ Response cache: seconds a prompt's answer stays fresh, per category,
+# plus how long a stale answer may still be served while it is refreshed.
+# Override with PERPLEXITY_CACHE_TTL_<CATEGORY> / PERPLEXITY_CACHE_STALE_TTL.
+CACHE_TTLS = {
+    "news_articles": 1800,
+    "jobs": 900,
+    "internships": 1800,
+}
+DEFAULT_CACHE_TTL = float(os.getenv("PERPLEXITY_CACHE_TTL", "600"))
+CACHE_STALE_TTL = float(os.getenv("PERPLEXITY_CACHE_STALE_TTL", "1800"))
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
     """
-    Calls the Perplexity API (Sonar Pro model) and returns the response text.
+    Returns the process-wide keep-alive session used for all Perplexity calls.
     """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=1,
+                    pool_maxsize=max(PERPLEXITY_MAX_CONCURRENCY, 1),
+                )
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+
+rate_limiter = TokenBucket(PERPLEXITY_RATE_PER_SEC, PERPLEXITY_BURST)
+circuit_breaker = CircuitBreaker(PERPLEXITY_BREAKER_THRESHOLD, PERPLEXITY_BREAKER_COOLDOWN)
+
+
+def _post(headers: Dict[str, str], payload: Dict, read_timeout: float, category: Optional[str], stream: bool = False) -> Optional[requests.Response]:
+    """
+    POSTs to Perplexity through the rate limiter and circuit breaker, retrying
+    timeouts, connection errors, 429s and 5xx with jittered exponential
+    backoff (or the server's Retry-After). Returns the first non-retryable
+    response, or None once retries are exhausted or the circuit is open.
+    """
+    label = category or "prompt"
+    for attempt in range(PERPLEXITY_MAX_RETRIES + 1):
+        if not circuit_breaker.allow():
+            print(f"[CIRCUIT] ⛔ Perplexity circuit open; skipping {label}")
+            return None
+        if not rate_limiter.acquire(timeout=read_timeout):
+            print(f"[RATE LIMIT] ⏳ No request slot for {label} within {read_timeout:.0f}s")
+            return None
+
+        delay = None
+        with timed("perplexity.attempt", category) as t:
+            try:
+                response = get_session().post(
+                    PERPLEXITY_API_URL,
+                    headers=headers,
+                    json=payload,
+                    timeout=(PERPLEXITY_CONNECT_TIMEOUT, read_timeout),
+                    stream=stream,
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                t.error()
+                circuit_breaker.record_failure()
+                print(f"[RETRY] {label} attempt {attempt + 1} failed: {e}")
+            except Exception:
+                # Not retryable, but it must still settle a half-open trial.
+                t.error()
+                circuit_breaker.record_failure()
+                raise
+            else:
+                if response.status_code not in RETRYABLE_STATUS:
+                    circuit_breaker.record_success()
+                    return response
+                t.error()
+                circuit_breaker.record_failure()
+                delay = retry_after_seconds(response.headers.get("Retry-After"))
+                if response.status_code == 429:
+                    # Hold back every caller, not just this one.
+                    rate_limiter.pause(delay if delay is not None else backoff_delay(attempt, PERPLEXITY_BACKOFF_BASE, PERPLEXITY_BACKOFF_MAX))
+                print(f"[RETRY] {label} attempt {attempt + 1} got HTTP {response.status_code}")
+                response.close()
+
+        if attempt == PERPLEXITY_MAX_RETRIES:
+            break
+        if delay is None:
+            delay = backoff_delay(attempt, PERPLEXITY_BACKOFF_BASE, PERPLEXITY_BACKOFF_MAX)
+        time.sleep(min(delay, PERPLEXITY_BACKOFF_MAX))
+
+    print(f"[ERROR] Perplexity call for {label} failed after {PERPLEXITY_MAX_RETRIES + 1} attempts")
+    return None
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+_revalidating = set()
+
+
+def get_cache() -> Optional[ResponseCache]:
+    """
+    Returns the process-wide response cache, or None if caching is disabled.
+    """
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                backend = build_backend()
+                _cache = ResponseCache(backend) if backend is not None else False
+    return _cache or None
+
+
+def set_cache(cache: Optional[ResponseCache]):
+    """
+    Swaps the response cache (pass None to disable caching).
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache if cache is not None else False
+
+
+def cache_ttl(category: Optional[str]) -> float:
+    if category:
+        override = os.getenv(f"PERPLEXITY_CACHE_TTL_{category.upper()}")
+        if override:
+            return float(override)
+        if category in CACHE_TTLS:
+            return float(CACHE_TTLS[category])
+    return DEFAULT_CACHE_TTL
+
+
+def cache_stats() -> Dict[str, int]:
+    cache = get_cache()
+    return cache.stats() if cache else {}
+
+
+def _build_request(prompt: str, stream: bool = False, response_format: Optional[Dict] = None) -> Optional[Tuple[Dict[str, str], Dict]]:
     api_key = os.getenv("PERPLEXITY_API_KEY")
     if not api_key:
         print("[ERROR] PERPLEXITY_API_KEY not set in environment variables.")
@@ -20,28 +182,294 @@ def fetch_perplexity_response(prompt: str) -> Optional[str]:
     }
 
     payload = {
-        "model": "sonar-pro",
+        "model": PERPLEXITY_MODEL,
         "messages": [
             {
                 "role": "system",
-                "content": "You are Askarg AI Assistant helping students find tech news and jobs. Always respond in pure JSON format without explanations or markdown."
+                "content": SYSTEM_PROMPT
             },
             {
                 "role": "user",
                 "content": prompt
             }
         ],
-        "temperature": 0.5
+        "temperature": PERPLEXITY_TEMPERATURE
     }
+    if response_format:
+        payload["response_format"] = response_format
+    if stream:
+        payload["stream"] = True
+        headers["Accept"] = "text/event-stream"
+
+    return headers, payload
+
+
+def _request_completion(
+    prompt: str,
+    timeout: Optional[float] = None,
+    category: Optional[str] = None,
+    response_format: Optional[Dict] = None,
+) -> Optional[str]:
+    request = _build_request(prompt, response_format=response_format)
+    if request is None:
+        return None
+    headers, payload = request
+
+    read_timeout = timeout if timeout is not None else PERPLEXITY_TIMEOUT
+    response = None
+    with timed("perplexity.completion", category) as t:
+        try:
+            response = _post(headers, payload, read_timeout, category)
+            if response is None:
+                t.error()
+                return None
+            t.payload(len(response.content))
+            response.raise_for_status()
+            content = response.json().get("choices", [])[0]["message"]["content"]
+            return content.strip()
+        except requests.exceptions.HTTPError as http_err:
+            t.error()
+            print(f"[HTTP ERROR] {response.status_code}: {response.text}")
+        except Exception as e:
+            t.error()
+            print(f"[ERROR] Perplexity API call failed: {e}")
 
-    try:
-        response = requests.post(PERPLEXITY_API_URL, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-        content = response.json().get("choices", [])[0]["message"]["content"]
-        return content.strip()
-    except requests.exceptions.HTTPError as http_err:
-        print(f"[HTTP ERROR] {response.status_code}: {response.text}")
-    except Exception as e:
-        print(f"[ERROR] Perplexity API call failed: {e}")
-    
     return None
+
+
+def _revalidate(cache: ResponseCache, key: str, prompt: str, timeout: Optional[float], category: Optional[str], response_format: Optional[Dict]):
+    try:
+        content = _request_completion(prompt, timeout, category, response_format)
+        if content:
+            cache.store(key, content)
+    finally:
+        with _cache_lock:
+            _revalidating.discard(key)
+
+
+def _schedule_revalidate(
+    cache: ResponseCache,
+    key: str,
+    prompt: str,
+    timeout: Optional[float],
+    category: Optional[str],
+    response_format: Optional[Dict] = None,
+):
+    with _cache_lock:
+        if key in _revalidating:
+            return
+        _revalidating.add(key)
+    threading.Thread(
+        target=_revalidate, args=(cache, key, prompt, timeout, category, response_format),
+        name="perplexity-revalidate", daemon=True,
+    ).start()
+
+
+def fetch_perplexity_response(
+    prompt: str,
+    timeout: Optional[float] = None,
+    category: Optional[str] = None,
+    use_cache: bool = True,
+    response_format: Optional[Dict] = None,
+) -> Optional[str]:
+    """
+    Calls the Perplexity API (Sonar Pro model) and returns the response text.
+
+    Answers are cached per (model, system prompt, prompt, temperature,
+    response format) for the category's TTL. Past the TTL the stale answer is
+    returned immediately and refreshed in the background.
+    """
+    cache = get_cache() if use_cache else None
+    if cache is None:
+        return _request_completion(prompt, timeout, category, response_format)
+
+    key = cache_key(PERPLEXITY_MODEL, SYSTEM_PROMPT, prompt, PERPLEXITY_TEMPERATURE, response_format)
+    value, state = cache.lookup(key, cache_ttl(category), CACHE_STALE_TTL)
+    if state == "fresh":
+        print(f"[CACHE] ✅ Hit for {category or 'prompt'}")
+        return value
+    if state == "stale":
+        _schedule_revalidate(cache, key, prompt, timeout, category, response_format)
+        print(f"[CACHE] ♻️ Serving stale {category or 'prompt'} while revalidating")
+        return value
+
+    content = _request_completion(prompt, timeout, category, response_format)
+    if content:
+        cache.store(key, content)
+    return content
+
+
+def _stream_completion(prompt: str, timeout: Optional[float] = None, category: Optional[str] = None) -> Iterator[str]:
+    # Generator return value tells the caller whether the stream finished cleanly.
+    request = _build_request(prompt, stream=True)
+    if request is None:
+        return False
+    headers, payload = request
+
+    read_timeout = timeout if timeout is not None else PERPLEXITY_TIMEOUT
+    with timed("perplexity.stream", category) as t:
+        try:
+            # Retries only cover getting the stream started.
+            response = _post(headers, payload, read_timeout, category, stream=True)
+            if response is None:
+                t.error()
+                return False
+            with response:
+                if response.status_code >= 400:
+                    t.error()
+                    print(f"[HTTP ERROR] {response.status_code}: {response.text}")
+                    return False
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    t.payload(len(line))
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    try:
+                        choice = json.loads(data).get("choices", [{}])[0]
+                    except (json.JSONDecodeError, IndexError, AttributeError):
+                        continue
+                    delta = (choice.get("delta") or {}).get("content")
+                    if delta:
+                        yield delta
+            return True
+        except Exception as e:
+            t.error()
+            print(f"[ERROR] Perplexity stream failed: {e}")
+            return False
+
+
+def stream_perplexity_response(
+    prompt: str,
+    timeout: Optional[float] = None,
+    category: Optional[str] = None,
+    use_cache: bool = True,
+) -> Iterator[str]:
+    """
+    Streams the completion (SSE, `stream: true`) and yields text chunks as
+    they arrive. Pair with utils.parser.iter_posts to get posts incrementally.
+
+    A fresh or stale cached answer is yielded as a single chunk; a fully
+    received stream is written back to the cache. Raises RuntimeError if the
+    call failed before any text arrived, so callers can tell a failure from
+    an empty answer.
+    """
+    cache = get_cache() if use_cache else None
+    key = None
+    if cache is not None:
+        key = cache_key(PERPLEXITY_MODEL, SYSTEM_PROMPT, prompt, PERPLEXITY_TEMPERATURE)
+        value, state = cache.lookup(key, cache_ttl(category), CACHE_STALE_TTL)
+        if state != "miss":
+            if state == "stale":
+                _schedule_revalidate(cache, key, prompt, timeout, category)
+            yield value
+            return
+
+    parts = []
+    stream = _stream_completion(prompt, timeout, category)
+    while True:
+        try:
+            delta = next(stream)
+        except StopIteration as stop:
+            complete = bool(stop.value)
+            break
+        parts.append(delta)
+        yield delta
+
+    if not complete and not parts:
+        raise RuntimeError(f"Perplexity stream for {category or 'prompt'} failed")
+
+    # Only cache answers that were received in full.
+    if complete and cache is not None and parts:
+        cache.store(key, "".join(parts).strip())
+
+
+def fetch_perplexity_responses(
+    prompts: Dict[str, str],
+    max_concurrency: Optional[int] = None,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> Iterator[Tuple[str, Optional[str]]]:
+    """
+    Issues all prompts at once over the shared session and yields
+    (key, content) pairs in completion order.
+
+    Args:
+        prompts (dict): Mapping of category key -> prompt text
+        max_concurrency (int): Upper bound on in-flight requests
+        timeout (float): Per-request deadline in seconds
+        use_cache (bool): False to always call the API
+
+    Yields:
+        (key, content) where content is None if the call failed or missed its deadline
+    """
+    if not prompts:
+        return
+
+    deadline = timeout if timeout is not None else PERPLEXITY_TIMEOUT
+    workers = min(max_concurrency or PERPLEXITY_MAX_CONCURRENCY, len(prompts))
+    executor = ThreadPoolExecutor(max_workers=max(workers, 1), thread_name_prefix="perplexity")
+    futures = {
+        executor.submit(fetch_perplexity_response, prompt, deadline, key, use_cache): key
+        for key, prompt in prompts.items()
+    }
+    pending = set(futures)
+    # Requests queue behind the concurrency limit, so the overall budget
+    # covers one deadline per "wave" plus connection setup and retries.
+    waves = -(-len(prompts) // max(workers, 1))
+    attempts = PERPLEXITY_MAX_RETRIES + 1
+    overall = waves * ((deadline + PERPLEXITY_CONNECT_TIMEOUT) * attempts + PERPLEXITY_BACKOFF_MAX * (attempts - 1))
+    try:
+        for future in as_completed(futures, timeout=overall):
+            pending.discard(future)
+            try:
+                content = future.result()
+            except Exception as e:
+                print(f"[ERROR] Perplexity fetch for {futures[future]} failed: {e}")
+                content = None
+            yield futures[future], content
+    except FuturesTimeoutError:
+        for future in pending:
+            future.cancel()
+            print(f"[ERROR] Perplexity fetch for {futures[future]} missed its deadline")
+            yield futures[future], None
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def build_combined_prompt(prompts: Dict[str, str]) -> str:
+    """
+    Merges per-category prompts into one request for a keyed JSON object.
+    """
+    keys = ", ".join(f'"{key}"' for key in prompts)
+    sections = "\n\n".join(f'Task "{key}":\n{prompt}' for key, prompt in prompts.items())
+    return (
+        f"Complete each of the following {len(prompts)} tasks. Return a single JSON object "
+        f"with exactly the keys {keys}; each key holds the JSON array its task asks for.\n\n"
+        f"{sections}"
+    )
+
+
+def fetch_combined_response(
+    prompts: Dict[str, str],
+    schema: Dict,
+    timeout: Optional[float] = None,
+    use_cache: bool = True,
+) -> Optional[str]:
+    """
+    Fetches every category in one structured-output request.
+
+    Args:
+        prompts (dict): Mapping of category key -> prompt text
+        schema (dict): JSON schema of the keyed response object
+        timeout (float): Read deadline in seconds
+        use_cache (bool): False to always call the API
+
+    Returns:
+        The raw response text, or None if the call failed
+    """
+    response_format = {"type": "json_schema", "json_schema": {"schema": schema}}
+    return fetch_perplexity_response(
+        build_combined_prompt(prompts), timeout, "combined", use_cache, response_format
+    )
@@ -0,0 +1,232 @@
+"""
+Offline end-to-end benchmark for the ingest, cleanup and notification paths.
+
+Runs main.fetch_and_upload, delete_old_content, delete_old_chat_messages and
+chat_routes.send_chat_notification against local stand-ins (see
+bench_fakes.py) and reports throughput, p50/p99 latency and round-trips.
+
+    python scripts/bench_e2e.py
+    python scripts/bench_e2e.py --rooms 10000 --messages 1000000 --rpc-latency 0.002
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Union
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fakes import FakeFirestore, FakePerplexityServer, RecordingMessaging  # noqa: E402
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def install_fakes(db: FakeFirestore, fcm: RecordingMessaging):
+    """
+    Injects the in-memory stand-ins into the client provider and FCM module.
+    """
+    from firebase_admin import firestore, messaging
+    from utils.firebase import set_app, set_db
+
+    set_app(object())
+    set_db(db)
+    firestore.Query = FakeFirestore.Query
+    for name in ("send", "send_each_for_multicast", "send_multicast", "send_each",
+                 "subscribe_to_topic", "unsubscribe_from_topic"):
+        setattr(messaging, name, getattr(fcm, name))
+
+
+class Scenario:
+    def __init__(self, name: str, db: FakeFirestore, fcm: RecordingMessaging, server: FakePerplexityServer):
+        self.name = name
+        self.db = db
+        self.fcm = fcm
+        self.server = server
+        self.latencies: List[float] = []
+        self.units = 0
+        self.wall = 0.0
+        self._start_requests = 0
+
+    def __enter__(self):
+        self.db.reset_counters()
+        self.fcm.reset_counters()
+        self._start_requests = self.server.requests
+        return self
+
+    def measure(self, fn: Callable, units: Union[int, Callable] = 1):
+        """
+        Times one call. `units` is a count, or a function of the call's result
+        that returns one (e.g. the number of docs a purge actually deleted).
+        """
+        t0 = time.perf_counter()
+        result = fn()
+        elapsed = time.perf_counter() - t0
+        self.latencies.append(elapsed)
+        self.wall += elapsed
+        self.units += units(result) if callable(units) else units
+        return result
+
+    def __exit__(self, *exc):
+        return False
+
+    def report(self, unit: str) -> Dict:
+        return {
+            "scenario": self.name,
+            "runs": len(self.latencies),
+            "unit": unit,
+            "units": self.units,
+            "throughput_per_s": self.units / self.wall if self.wall else 0.0,
+            "p50_ms": percentile(self.latencies, 50) * 1000,
+            "p99_ms": percentile(self.latencies, 99) * 1000,
+            "firestore_rpcs": dict(self.db.rpcs),
+            "fcm_calls": dict(self.fcm.calls),
+            "perplexity_requests": self.server.requests - self._start_requests,
+        }
+
+
+def seed_content(db: FakeFirestore, docs: int, expired_ratio: float):
+    now = datetime.utcnow()
+    old = now - timedelta(days=3)
+    for i in range(docs):
+        ts = old if i < docs * expired_ratio else now
+        collection = "news_articles" if i % 2 else "internships_jobs"
+        db.seed(f"{collection}/seed{i}", {"title": f"Seed {i}", "link": f"https://example.com/{i}", "timestamp": ts})
+
+
+def seed_chat(db: FakeFirestore, rooms: int, messages: int, participants: int, expired_ratio: float, rng: random.Random):
+    now = datetime.utcnow()
+    old = now - timedelta(days=3)
+    for r in range(rooms):
+        members = [f"user{(r * participants + p) % (rooms * 2 + participants)}" for p in range(participants)]
+        db.seed(f"chat_rooms/room{r}", {"participants": members})
+        for uid in members:
+            db.seed(f"users/{uid}", {"fcm_token": f"token-{uid}"})
+    for m in range(messages):
+        room = rng.randrange(rooms)
+        ts = old if rng.random() < expired_ratio else now
+        db.seed(f"chat_rooms/room{room}/messages/m{m}", {"text": "hi", "sender": "bench", "timestamp": ts})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fetch-runs", type=int, default=20)
+    parser.add_argument("--items", type=int, default=5, help="posts per Perplexity response")
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="seconds per fake Perplexity call")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--rpc-latency", type=float, default=0.0, help="seconds per fake Firestore RPC")
+    parser.add_argument("--fcm-latency", type=float, default=0.0, help="seconds per fake FCM call")
+    parser.add_argument("--docs", type=int, default=10_000, help="news/job docs seeded for cleanup")
+    parser.add_argument("--cleanup-runs", type=int, default=3)
+    parser.add_argument("--rooms", type=int, default=1_000)
+    parser.add_argument("--messages", type=int, default=100_000)
+    parser.add_argument("--participants", type=int, default=5)
+    parser.add_argument("--expired", type=float, default=0.2, help="fraction of seeded docs past retention")
+    parser.add_argument("--notifications", type=int, default=500)
+    parser.add_argument("--burst", type=int, default=10, help="messages per active room")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    db = FakeFirestore(latency=args.rpc_latency)
+    fcm = RecordingMessaging(latency=args.fcm_latency)
+    server = FakePerplexityServer(latency=args.llm_latency, error_rate=args.llm_error_rate, items=args.items).start()
+
+    os.environ.setdefault("PERPLEXITY_API_KEY", "bench")
+    os.environ["PERPLEXITY_API_URL"] = server.url
+    os.environ["PERPLEXITY_CACHE_BACKEND"] = "none"
+    # The client's token bucket (1 req/s by default) would dominate the ingest
+    # numbers; measure the pipeline unthrottled unless asked otherwise.
+    os.environ.setdefault("PERPLEXITY_RATE_PER_SEC", "0")
+    os.environ["SCHEDULER_ENABLED"] = "0"
+    # Fake posts link to real job boards; don't probe them
+    os.environ["LINK_VALIDATION"] = "0"
+    # Hold chat pushes until the explicit flush so every burst is coalesced
+    os.environ.setdefault("CHAT_NOTIFY_WINDOW", "600")
+    os.environ.setdefault("CHAT_NOTIFY_MAX_DELAY", "600")
+    install_fakes(db, fcm)
+
+    import main as app_main
+    import chat_routes
+    from perplexity.client import rate_limiter
+
+    limit = f"{rate_limiter.rate:g} req/s, burst {rate_limiter.capacity:g}" if rate_limiter.rate > 0 else "off"
+    print(f"Perplexity rate limit: {limit}")
+
+    reports = []
+    try:
+        # 📡 Ingest
+        with Scenario("fetch_and_upload", db, fcm, server) as sc:
+            for _ in range(args.fetch_runs):
+                sc.measure(lambda: app_main.refresh_runner.run(app_main.PROMPTS, token="bench-device"))
+        reports.append(sc.report("refreshes"))
+
+        # 🧹 Content retention
+        with Scenario("delete_old_content", db, fcm, server) as sc:
+            for _ in range(args.cleanup_runs):
+                seed_content(db, args.docs, args.expired)
+                sc.measure(app_main.delete_old_content, units=lambda deleted: sum(deleted.values()))
+        reports.append(sc.report("docs deleted"))
+
+        # 🧹 Chat retention
+        print(f"Seeding {args.rooms} rooms / {args.messages} messages...")
+        seed_chat(db, args.rooms, args.messages, args.participants, args.expired, rng)
+        with Scenario("delete_old_chat_messages", db, fcm, server) as sc:
+            for run in range(args.cleanup_runs):
+                if run:
+                    seed_chat(db, args.rooms, args.messages, args.participants, args.expired, rng)
+                sc.measure(app_main.delete_old_chat_messages, units=lambda deleted: sum(deleted.values()))
+        reports.append(sc.report("messages deleted"))
+
+        # 💬 Chat fan-out: bursts of messages into a few rooms, then one flush
+        # of the coalescing queue (handler latency and fan-out measured separately)
+        async def notify_once(room: int):
+            payload = {"roomId": f"room{room}", "sender": "nobody", "text": "bench"}
+            await chat_routes.send_chat_notification(payload)
+
+        with Scenario("send_chat_notification", db, fcm, server) as sc:
+            loop = asyncio.new_event_loop()
+            try:
+                active = [rng.randrange(args.rooms) for _ in range(max(1, args.notifications // args.burst))]
+                for _ in range(args.notifications):
+                    room = rng.choice(active)
+                    sc.measure(lambda: loop.run_until_complete(notify_once(room)))
+            finally:
+                loop.close()
+            t0 = time.perf_counter()
+            chat_routes.notification_queue.flush()
+            fanout = time.perf_counter() - t0
+        report = sc.report("notifications")
+        report["fanout_ms"] = fanout * 1000
+        report["devices_notified"] = fcm.delivered
+        reports.append(report)
+    finally:
+        server.stop()
+
+    for r in reports:
+        print(f"\n== {r['scenario']} ==")
+        print(f"  runs {r['runs']}, {r['units']} {r['unit']}, {r['throughput_per_s']:.1f} {r['unit']}/s")
+        print(f"  p50 {r['p50_ms']:.1f} ms   p99 {r['p99_ms']:.1f} ms")
+        if "fanout_ms" in r:
+            print(f"  fan-out flush {r['fanout_ms']:.1f} ms   devices {r['devices_notified']}")
+        print(f"  firestore rpcs {r['firestore_rpcs']}")
+        print(f"  fcm calls {r['fcm_calls']}   perplexity requests {r['perplexity_requests']}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
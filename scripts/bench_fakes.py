@@ -0,0 +1,594 @@
+"""
+Local stand-ins for the external services used by the backend, for
+offline benchmarks:
+
+- FakePerplexityServer: HTTP server speaking the chat/completions API
+  (plain and SSE) with configurable latency, error rate and payload size.
+- FakeFirestore: in-memory Firestore client covering the subset of the API
+  the backend uses, counting every round-trip.
+- RecordingMessaging: FCM stand-in that records sends instead of delivering.
+- FakeLinkServer: HTTP server with live, dead, redirecting, HEAD-refusing
+  and slow pages, for link validation.
+"""
+import json
+import time
+import random
+import itertools
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+
+# ---------------------------------------------------------------------------
+# Perplexity
+# ---------------------------------------------------------------------------
+
+class FakePerplexityServer:
+    """
+    Answers POST /chat/completions with a JSON array of `items` posts, or,
+    for structured-output requests, an object with one array per key of the
+    requested schema.
+
+    Every response uses fresh titles/links (so ingest never dedups them
+    away) unless `repeat=True`. Failures are injected at `error_rate` with
+    `error_status` (and an optional Retry-After header); at `timeout_rate`
+    the server stalls for `hang` seconds before answering.
+    """
+
+    def __init__(self, latency: float = 0.0, error_rate: float = 0.0, items: int = 5,
+                 repeat: bool = False, host: str = "127.0.0.1", port: int = 0, seed: int = 7,
+                 error_status: int = 503, retry_after: Optional[float] = None,
+                 timeout_rate: float = 0.0, hang: float = 5.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.timeout_rate = timeout_rate
+        self.hang = hang
+        self.items = items
+        self.repeat = repeat
+        self.requests = 0
+        self._counter = itertools.count()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}")
+                try:
+                    server._handle(self, body)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (e.g. a stalled response hit its timeout).
+                    self.close_connection = True
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/chat/completions"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def make_posts(self) -> List[Dict[str, str]]:
+        batch = 0 if self.repeat else next(self._counter)
+        platforms = ["linkedin.com", "indeed.com", "internshala.com", "wellfound.com", "amazon.jobs",
+                     "careers.microsoft.com", "github.com", "ibm.com", "cognizant.com", "hackerearth.com"]
+        return [
+            {
+                "title": f"Bench post {batch}-{i}",
+                "summary": "Synthetic benchmark item. " * 4,
+                "company": "Askarg Bench",
+                "location": "Remote",
+                "link": f"https://{platforms[i % len(platforms)]}/jobs/{batch}-{i}",
+            }
+            for i in range(self.items)
+        ]
+
+    def _handle(self, handler: BaseHTTPRequestHandler, body: Dict):
+        with self._lock:
+            self.requests += 1
+            fail = self._rng.random() < self.error_rate
+            stall = not fail and self._rng.random() < self.timeout_rate
+        if self.latency:
+            time.sleep(self.latency)
+        if stall:
+            time.sleep(self.hang)
+        if fail:
+            payload = b'{"error": "injected failure"}'
+            handler.send_response(self.error_status)
+            if self.retry_after is not None:
+                handler.send_header("Retry-After", str(self.retry_after))
+            handler.send_header("Content-Type", "application/json")
+            handler.send_header("Content-Length", str(len(payload)))
+            handler.end_headers()
+            handler.wfile.write(payload)
+            return
+
+        schema = (body.get("response_format") or {}).get("json_schema", {}).get("schema")
+        if schema:
+            content = json.dumps({key: self.make_posts() for key in schema.get("properties", {})})
+        else:
+            content = json.dumps(self.make_posts())
+        if body.get("stream"):
+            chunks = [content[i:i + 64] for i in range(0, len(content), 64)]
+            events = "".join(
+                "data: " + json.dumps({"choices": [{"delta": {"content": c}}]}) + "\n\n" for c in chunks
+            ) + "data: [DONE]\n\n"
+            payload = events.encode("utf-8")
+            content_type = "text/event-stream"
+        else:
+            payload = json.dumps({"choices": [{"message": {"content": content}}]}).encode("utf-8")
+            content_type = "application/json"
+        handler.send_response(200)
+        handler.send_header("Content-Type", content_type)
+        handler.send_header("Content-Length", str(len(payload)))
+        handler.end_headers()
+        handler.wfile.write(payload)
+
+
+# ---------------------------------------------------------------------------
+# Links
+# ---------------------------------------------------------------------------
+
+class FakeLinkServer:
+    """
+    Serves pages for link validation:
+
+    - /ok/<n>        200
+    - /dead/<n>      404
+    - /gone/<n>      410
+    - /redirect/<n>  301 to /ok/<n>
+    - /authwall/<n>  302 to /blocked/<n>
+    - /nohead/<n>    405 on HEAD, 200 on GET
+    - /blocked/<n>   403 (bot wall)
+    - /slow/<n>      200 after `slow` seconds
+
+    Every request is counted per (method, kind) in `hits`.
+    """
+
+    def __init__(self, slow: float = 5.0, latency: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.slow = slow
+        self.latency = latency
+        self.hits: Counter = Counter()
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle(self):
+                try:
+                    super().handle()
+                except (BrokenPipeError, ConnectionResetError):
+                    # The validator closes connections without reading GET bodies.
+                    pass
+
+            def do_HEAD(self):
+                server._handle(self, "HEAD")
+
+            def do_GET(self):
+                server._handle(self, "GET")
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def link(self, kind: str, n: int = 0) -> str:
+        return f"{self.base_url}/{kind}/{n}"
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _handle(self, handler: BaseHTTPRequestHandler, method: str):
+        parts = handler.path.strip("/").split("/")
+        kind, n = parts[0], parts[1] if len(parts) > 1 else "0"
+        with self._lock:
+            self.hits[(method, kind)] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        headers = {}
+        if kind == "ok":
+            status = 200
+        elif kind == "dead":
+            status = 404
+        elif kind == "gone":
+            status = 410
+        elif kind == "redirect":
+            status, headers = 301, {"Location": f"/ok/{n}"}
+        elif kind == "authwall":
+            status, headers = 302, {"Location": f"/blocked/{n}?x=1"}
+        elif kind == "nohead":
+            status = 405 if method == "HEAD" else 200
+        elif kind == "blocked":
+            status = 403
+        elif kind == "slow":
+            time.sleep(self.slow)
+            status = 200
+        else:
+            status = 404
+
+        body = b"<html><body>bench</body></html>"
+        try:
+            handler.send_response(status)
+            for name, value in headers.items():
+                handler.send_header(name, value)
+            handler.send_header("Content-Type", "text/html")
+            handler.send_header("Content-Length", str(len(body)))
+            handler.end_headers()
+            if method == "GET":
+                handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            handler.close_connection = True
+
+
+# ---------------------------------------------------------------------------
+# Firestore
+# ---------------------------------------------------------------------------
+
+_OPS = {
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "<": lambda a, b: a is not None and a < b,
+    "<=": lambda a, b: a is not None and a <= b,
+    ">": lambda a, b: a is not None and a > b,
+    ">=": lambda a, b: a is not None and a >= b,
+    "in": lambda a, b: a in b,
+    "array_contains": lambda a, b: isinstance(a, list) and b in a,
+}
+
+
+class FakeSnapshot:
+    def __init__(self, reference: "FakeDocRef", data: Optional[Dict]):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict]:
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field: str):
+        return (self._data or {}).get(field)
+
+
+class FakeDocRef:
+    def __init__(self, db: "FakeFirestore", path: str):
+        self._db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str) -> "FakeCollection":
+        return FakeCollection(self._db, f"{self.path}/{name}")
+
+    def get(self, transaction=None, **kwargs) -> FakeSnapshot:
+        self._db._rpc("get")
+        return FakeSnapshot(self, self._db._docs.get(self.path))
+
+    def set(self, data: Dict, merge: bool = False):
+        self._db._rpc("set")
+        self._db._write(self.path, data, merge)
+
+    def update(self, data: Dict):
+        self._db._rpc("update")
+        self._db._write(self.path, data, True)
+
+    def delete(self):
+        self._db._rpc("delete")
+        self._db._delete(self.path)
+
+
+class FakeQuery:
+    def __init__(self, db: "FakeFirestore", prefix: str, group: Optional[str] = None,
+                 filters=(), order=(), limit_to: Optional[int] = None, after=None, start=None):
+        self._db = db
+        self._prefix = prefix
+        self._group = group
+        self._filters = list(filters)
+        self._order = list(order)
+        self._limit = limit_to
+        self._after = after
+        self._start = start
+
+    def _clone(self, **changes) -> "FakeQuery":
+        fields = dict(filters=self._filters, order=self._order, limit_to=self._limit, after=self._after,
+                      start=self._start)
+        fields.update(changes)
+        return FakeQuery(self._db, self._prefix, self._group, **fields)
+
+    def where(self, field: str = None, op: str = None, value=None, filter=None) -> "FakeQuery":
+        if filter is not None:
+            field, op, value = filter.field_path, filter.op_string, filter.value
+        return self._clone(filters=self._filters + [(field, op, value)])
+
+    def order_by(self, field: str, direction: str = "ASCENDING") -> "FakeQuery":
+        return self._clone(order=self._order + [(field, direction)])
+
+    def limit(self, count: int) -> "FakeQuery":
+        return self._clone(limit_to=count)
+
+    def start_after(self, snapshot) -> "FakeQuery":
+        return self._clone(after=snapshot)
+
+    def start_at(self, values: Dict) -> "FakeQuery":
+        return self._clone(start=values)
+
+    def _matches(self):
+        for path, data in self._db._docs.items():
+            parent, _, doc_id = path.rpartition("/")
+            if self._group is not None:
+                if parent.rsplit("/", 1)[-1] != self._group:
+                    continue
+            elif parent != self._prefix:
+                continue
+            if all(_OPS[op](data.get(field), value) for field, op, value in self._filters):
+                yield path, data
+
+    def _sort_key(self, item):
+        path, data = item
+        return tuple(data.get(f) for f, _ in self._order) + (path,)
+
+    def stream(self, transaction=None):
+        self._db._rpc("query")
+        results = list(self._matches())
+        if self._order:
+            reverse = self._order[0][1] == FakeFirestore.Query.DESCENDING
+            results.sort(key=self._sort_key, reverse=reverse)
+        if self._start is not None:
+            # Field-value cursor: keep documents ordered at or after it.
+            cursor = tuple(self._start.get(f) for f, _ in self._order)
+            results = [r for r in results if self._sort_key(r)[:len(cursor)] >= cursor]
+        if self._after is not None:
+            after_path = self._after.reference.path
+            keys = [p for p, _ in results]
+            if after_path in keys:
+                results = results[keys.index(after_path) + 1:]
+        if self._limit is not None:
+            results = results[:self._limit]
+        for path, data in results:
+            yield FakeSnapshot(FakeDocRef(self._db, path), dict(data))
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db: "FakeFirestore", path: str):
+        super().__init__(db, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, doc_id: Optional[str] = None) -> FakeDocRef:
+        return FakeDocRef(self._db, f"{self._prefix}/{doc_id or self._db._auto_id()}")
+
+    def add(self, data: Dict):
+        ref = self.document()
+        ref.set(data)
+        return None, ref
+
+
+class FakeBatch:
+    def __init__(self, db: "FakeFirestore"):
+        self._db = db
+        self._ops = []
+
+    def set(self, ref: FakeDocRef, data: Dict, merge: bool = False):
+        self._ops.append(("set", ref.path, data, merge))
+
+    def update(self, ref: FakeDocRef, data: Dict):
+        self._ops.append(("set", ref.path, data, True))
+
+    def delete(self, ref: FakeDocRef):
+        self._ops.append(("delete", ref.path, None, False))
+
+    def commit(self):
+        if len(self._ops) > 500:
+            raise ValueError("maximum 500 writes allowed per batch")
+        self._db._rpc("commit")
+        for op, path, data, merge in self._ops:
+            if op == "set":
+                self._db._write(path, data, merge)
+            else:
+                self._db._delete(path)
+        self._ops = []
+
+
+class FakeFirestore:
+    """
+    In-memory Firestore with an optional per-RPC latency.
+
+    `rpcs` counts round-trips by kind: get, get_all, set, update, delete,
+    commit, query.
+    """
+
+    Query = SimpleNamespace(ASCENDING="ASCENDING", DESCENDING="DESCENDING")
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.rpcs = Counter()
+        self._docs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+
+    def _auto_id(self) -> str:
+        return f"auto{next(self._ids):012d}"
+
+    def _rpc(self, kind: str):
+        with self._lock:
+            self.rpcs[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _write(self, path: str, data: Dict, merge: bool):
+        from firebase_admin import firestore
+
+        with self._lock:
+            if merge and path in self._docs:
+                self._docs[path].update(data)
+            else:
+                self._docs[path] = dict(data)
+            doc = self._docs[path]
+            for field in [f for f, v in doc.items() if v is firestore.DELETE_FIELD]:
+                del doc[field]
+
+    def _delete(self, path: str):
+        with self._lock:
+            self._docs.pop(path, None)
+
+    def collection(self, name: str) -> FakeCollection:
+        return FakeCollection(self, name)
+
+    def collection_group(self, name: str) -> FakeQuery:
+        return FakeQuery(self, "", group=name)
+
+    def document(self, path: str) -> FakeDocRef:
+        return FakeDocRef(self, path)
+
+    def batch(self) -> FakeBatch:
+        return FakeBatch(self)
+
+    def get_all(self, refs, transaction=None, **kwargs):
+        self._rpc("get_all")
+        for ref in refs:
+            yield FakeSnapshot(ref, self._docs.get(ref.path))
+
+    def seed(self, path: str, data: Dict):
+        """
+        Writes without counting a round-trip.
+        """
+        self._docs[path] = dict(data)
+
+    def count(self, prefix: str) -> int:
+        return sum(1 for p in self._docs if p.rpartition("/")[0] == prefix)
+
+    def reset_counters(self):
+        with self._lock:
+            self.rpcs.clear()
+
+
+# ---------------------------------------------------------------------------
+# FCM
+# ---------------------------------------------------------------------------
+
+def _unregistered():
+    from firebase_admin import messaging
+
+    return messaging.UnregisteredError("Requested entity was not found.")
+
+
+class RecordingMessaging:
+    """
+    Drop-in for the parts of firebase_admin.messaging the backend calls.
+    Tokens listed in `invalid_tokens` fail as unregistered.
+    """
+
+    def __init__(self, latency: float = 0.0, invalid_tokens=()):
+        self.latency = latency
+        self.invalid_tokens = set(invalid_tokens)
+        self.calls = Counter()
+        self.delivered = 0
+        self.sent: List = []
+        self._lock = threading.Lock()
+
+    def _call(self, kind: str):
+        with self._lock:
+            self.calls[kind] += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def send(self, message, dry_run: bool = False, app=None):
+        self._call("send")
+        if getattr(message, "token", None) in self.invalid_tokens:
+            raise _unregistered()
+        with self._lock:
+            self.sent.append(message)
+            self.delivered += 1
+        return f"projects/bench/messages/{self.calls['send']}"
+
+    def send_each_for_multicast(self, message, dry_run: bool = False, app=None):
+        self._call("multicast")
+        responses = []
+        for token in message.tokens:
+            ok = token not in self.invalid_tokens
+            responses.append(SimpleNamespace(
+                success=ok,
+                message_id=f"projects/bench/messages/{token}" if ok else None,
+                exception=None if ok else _unregistered(),
+            ))
+        with self._lock:
+            self.sent.append(message)
+            self.delivered += sum(1 for r in responses if r.success)
+        success = sum(1 for r in responses if r.success)
+        return SimpleNamespace(responses=responses, success_count=success,
+                               failure_count=len(responses) - success)
+
+    send_multicast = send_each_for_multicast
+
+    def send_each(self, messages, dry_run: bool = False, app=None):
+        self._call("send_each")
+        responses = [SimpleNamespace(success=True, message_id="bench", exception=None) for _ in messages]
+        with self._lock:
+            self.sent.extend(messages)
+            self.delivered += len(messages)
+        return SimpleNamespace(responses=responses, success_count=len(messages), failure_count=0)
+
+    def _topic_response(self, tokens):
+        errors = [SimpleNamespace(index=i, reason="NOT_FOUND")
+                  for i, token in enumerate(tokens) if token in self.invalid_tokens]
+        return SimpleNamespace(success_count=len(tokens) - len(errors), failure_count=len(errors), errors=errors)
+
+    def subscribe_to_topic(self, tokens, topic, app=None):
+        self._call("subscribe")
+        return self._topic_response(tokens)
+
+    def unsubscribe_from_topic(self, tokens, topic, app=None):
+        self._call("unsubscribe")
+        return self._topic_response(tokens)
+
+    def reset_counters(self):
+        with self._lock:
+            self.calls.clear()
+            self.sent.clear()
+            self.delivered = 0
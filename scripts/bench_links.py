@@ -0,0 +1,98 @@
+"""
+Link validation against a local stub (see bench_fakes.FakeLinkServer):
+checks the verdict for each kind of page, then compares sequential and
+concurrent validation and a warm-cache pass.
+
+    python scripts/bench_links.py
+    python scripts/bench_links.py --links 200 --latency 0.05 --per-host 4
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_fakes import FakeLinkServer  # noqa: E402
+from utils.links import LinkValidator  # noqa: E402
+
+# kind -> (dropped, final path, stored path)
+EXPECTED = {
+    "ok": (False, "/ok/1", "/ok/1"),
+    "dead": (True, "/dead/1", None),
+    "gone": (True, "/gone/1", None),
+    "redirect": (False, "/ok/1", "/ok/1"),
+    "authwall": (False, "/blocked/1?x=1", "/authwall/1"),
+    "nohead": (False, "/nohead/1", "/nohead/1"),
+    "blocked": (False, "/blocked/1", "/blocked/1"),
+    "slow": (False, "/slow/1", "/slow/1"),
+}
+
+
+def check_verdicts(server: FakeLinkServer, read_timeout: float) -> bool:
+    validator = LinkValidator(read_timeout=read_timeout, allow_private=True)
+    passed = True
+    print(f"{'kind':<10} {'status':>6} {'dead':>5}  final")
+    for kind, (dead, path, _) in EXPECTED.items():
+        result = validator.check(server.link(kind, 1))
+        ok = result["dead"] == dead and result["final_url"] == server.base_url + path
+        passed &= ok
+        status = result["status"] or result["error"]
+        print(f"{kind:<10} {str(status):>6} {str(result['dead']):>5}  {result['final_url']}{'' if ok else '  ✗'}")
+
+    posts = [{"title": kind, "link": server.link(kind, 1)} for kind in EXPECTED]
+    kept = {post["title"]: post["link"] for post in validator.validate_posts(posts)}
+    expected = {kind: server.base_url + stored for kind, (dead, _, stored) in EXPECTED.items() if not dead}
+    passed &= kept == expected
+    print(f"validate_posts kept {len(kept)}/{len(posts)}, redirects canonicalized: {kept == expected}")
+    return passed
+
+
+def run(validator: LinkValidator, links, concurrent: bool) -> float:
+    t0 = time.perf_counter()
+    if concurrent:
+        validator.check_many(links)
+    else:
+        for link in links:
+            validator.check(link)
+    return time.perf_counter() - t0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="stub latency per request (s)")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--per-host", type=int, default=8, help="the stub is a single host")
+    parser.add_argument("--read-timeout", type=float, default=0.5)
+    args = parser.parse_args()
+
+    with FakeLinkServer(slow=args.read_timeout * 2) as server:
+        passed = check_verdicts(server, args.read_timeout)
+
+        server.latency = args.latency
+        kinds = ["ok", "redirect", "dead", "nohead"]
+        links = [server.link(kinds[i % len(kinds)], i) for i in range(args.links)]
+        options = dict(read_timeout=args.read_timeout, allow_private=True, per_host=args.per_host)
+
+        print(f"\n{'mode':<24} {'wall s':>8} {'requests':>9}")
+        for name, concurrency, warm in (
+            ("sequential", 1, False),
+            (f"concurrent x{args.concurrency}", args.concurrency, False),
+            ("concurrent, warm cache", args.concurrency, True),
+        ):
+            validator = LinkValidator(max_concurrency=concurrency, **options)
+            if warm:
+                validator.check_many(links)
+            server.hits.clear()
+            wall = run(validator, links, concurrent=concurrency > 1)
+            print(f"{name:<24} {wall:>8.3f} {sum(server.hits.values()):>9}")
+
+    print("\nverdicts:", "ok" if passed else "MISMATCH")
+    sys.exit(0 if passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Microbenchmark: compiled platform matcher vs. the old if-chain.
+
+    python scripts/bench_platforms.py [--links 200000] [--repeat 5]
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.platforms import get_matcher, host_of  # noqa: E402
+
+
+def legacy_extract_platform_from_link(url):
+    domain = urlparse(url).netloc.lower()
+    if "linkedin.com" in domain:
+        return "LinkedIn"
+    elif "indeed.com" in domain:
+        return "Indeed"
+    elif "internshala.com" in domain:
+        return "Internshala"
+    elif "angel.co" in domain or "wellfound.com" in domain:
+        return "AngelList"
+    elif "amazon.jobs" in domain:
+        return "Amazon"
+    elif "microsoft.com" in domain:
+        return "Microsoft"
+    elif "cognizant.com" in domain:
+        return "Cognizant"
+    elif "ibm.com" in domain:
+        return "IBM"
+    elif "google.com" in domain:
+        return "Google"
+    elif "hackerearth.com" in domain:
+        return "HackerEarth"
+    elif "radixweb.com" in domain:
+        return "Radixweb"
+    elif "github.com" in domain:
+        return "GitHub"
+    else:
+        return "Other"
+
+
+HOSTS = [
+    "www.linkedin.com", "in.indeed.com", "internshala.com", "wellfound.com", "angel.co",
+    "amazon.jobs", "careers.microsoft.com", "www.cognizant.com", "www.ibm.com",
+    "careers.google.com", "www.hackerearth.com", "radixweb.com", "github.com",
+    "techcrunch.com", "www.thehindu.com", "notgoogle.com.evil.io", "news.ycombinator.com",
+]
+
+
+def make_links(count: int, distinct: int, seed: int = 7):
+    rng = random.Random(seed)
+    pool = [
+        f"https://{rng.choice(HOSTS)}/jobs/view/{rng.randrange(10**9)}?utm_source=askarg"
+        for _ in range(distinct)
+    ]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def timeit(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--links", type=int, default=200_000)
+    parser.add_argument("--distinct", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    links = make_links(args.links, args.distinct)
+    matcher = get_matcher()
+
+    legacy = timeit(lambda: [legacy_extract_platform_from_link(u) for u in links], args.repeat)
+    host_of.cache_clear()
+    cold = timeit(lambda: (host_of.cache_clear(), matcher.classify_many(links)), args.repeat)
+    warm = timeit(lambda: matcher.classify_many(links), args.repeat)
+
+    print(f"links: {len(links)} ({args.distinct} distinct), best of {args.repeat}")
+    for name, seconds in (("if-chain", legacy), ("trie (cold cache)", cold), ("trie (warm cache)", warm)):
+        print(f"  {name:<20} {seconds * 1000:9.1f} ms  {len(links) / seconds / 1e6:6.2f} M links/s")
+
+    mismatches = sum(
+        1 for u in links[:args.distinct]
+        if legacy_extract_platform_from_link(u) != matcher.classify(u)
+    )
+    print(f"  classification differences vs if-chain (first {args.distinct}): {mismatches}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Exercises the Perplexity client's rate limiter, retries and circuit breaker
+against the local fake server (see bench_fakes.py) with injected 429s,
+5xx outages and stalled responses.
+
+    python scripts/bench_resilience.py [--calls 20]
+"""
+import os
+import sys
+import time
+import argparse
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault("PERPLEXITY_API_KEY", "bench")
+os.environ["PERPLEXITY_CACHE_BACKEND"] = "none"
+
+from bench_fakes import FakePerplexityServer  # noqa: E402
+from perplexity import client  # noqa: E402
+from perplexity.resilience import CircuitBreaker, TokenBucket  # noqa: E402
+
+SCENARIOS = [
+    ("429 with Retry-After (40%)", dict(error_rate=0.4, error_status=429, retry_after=0.2)),
+    ("503 bursts (40%)", dict(error_rate=0.4, error_status=503)),
+    ("stalled responses (30%)", dict(timeout_rate=0.3, hang=1.5)),
+    ("full outage", dict(error_rate=1.0, error_status=503)),
+]
+
+
+def configure(args):
+    client.PERPLEXITY_MAX_RETRIES = args.retries
+    client.PERPLEXITY_BACKOFF_BASE = args.backoff
+    client.PERPLEXITY_BACKOFF_MAX = args.backoff * 8
+    client.rate_limiter = TokenBucket(args.rate, args.burst)
+    client.circuit_breaker = CircuitBreaker(args.breaker_threshold, args.breaker_cooldown)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=0.5, help="client read timeout (s)")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.05)
+    parser.add_argument("--rate", type=float, default=50)
+    parser.add_argument("--burst", type=float, default=5)
+    parser.add_argument("--breaker-threshold", type=int, default=5)
+    parser.add_argument("--breaker-cooldown", type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{'scenario':<28} {'ok':>5} {'http reqs':>10} {'wall s':>8} {'breaker':>10}")
+    for name, options in SCENARIOS:
+        configure(args)
+        with FakePerplexityServer(**options) as server:
+            client.PERPLEXITY_API_URL = server.url
+            t0 = time.perf_counter()
+            ok = sum(
+                1 for i in range(args.calls)
+                if client.fetch_perplexity_response(f"bench prompt {i}", timeout=args.timeout, use_cache=False)
+            )
+            wall = time.perf_counter() - t0
+            print(f"{name:<28} {ok:>2}/{args.calls:<2} {server.requests:>10} {wall:>8.2f} {client.circuit_breaker.state:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Cold-start benchmark: time from `import main` to the first /ping response,
+with Firebase/Firestore initialized lazily (current behaviour) versus eagerly
+at import (the old behaviour, emulated by calling get_db() up front and
+making one Firestore read, which opens the gRPC channel and, with real
+credentials, fetches an access token).
+
+Each sample is a fresh interpreter. The eager read needs a backend: pass
+--credentials for a real project or --emulator for the Firestore emulator.
+Without either, a throwaway key is generated and the eager path only builds
+the client (no RPC), which doesn't model the old cold start; the two medians
+are then typically within noise of each other.
+
+    python scripts/bench_startup.py [--runs 7] [--credentials serviceAccountKey.json | --emulator localhost:8080]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = r"""
+import sys, time
+sys.path.insert(0, {root!r})
+from fastapi.testclient import TestClient
+t0 = time.perf_counter()
+import main
+if {eager}:
+    from utils.firebase import get_db
+    db = get_db()
+    if {rpc}:
+        db.collection("bench").document("startup").get(timeout=30)
+response = TestClient(main.app).get("/ping")
+assert response.status_code == 200, response.text
+print(time.perf_counter() - t0)
+"""
+
+
+def write_dummy_credentials(directory: str) -> str:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+    ).decode("ascii")
+    path = os.path.join(directory, "serviceAccountKey.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "type": "service_account",
+            "project_id": "askarg-bench",
+            "private_key_id": "bench",
+            "private_key": pem,
+            "client_email": "bench@askarg-bench.iam.gserviceaccount.com",
+            "client_id": "0",
+            "token_uri": "https://oauth2.googleapis.com/token",
+        }, f)
+    return path
+
+
+def sample(eager: bool, rpc: bool, env: dict) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(root=ROOT, eager=eager, rpc=rpc)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--credentials", help="service account JSON (default: generated dummy key)")
+    parser.add_argument("--emulator", help="Firestore emulator host:port for the eager read")
+    args = parser.parse_args()
+    rpc = bool(args.credentials or args.emulator)
+    if not rpc:
+        print("⚠️ No --credentials/--emulator: the eager path makes no RPC, so this only "
+              "measures client construction.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ)
+        env["GOOGLE_APPLICATION_CREDENTIALS"] = args.credentials or write_dummy_credentials(tmp)
+        env["SCHEDULER_ENABLED"] = "0"
+        if args.emulator:
+            env["FIRESTORE_EMULATOR_HOST"] = args.emulator
+
+        results = {}
+        for label, eager in (("lazy", False), ("eager", True)):
+            results[label] = [sample(eager, rpc, env) for _ in range(args.runs)]
+
+    for label, samples in results.items():
+        print(f"{label:<6} median {statistics.median(samples) * 1000:7.1f} ms   "
+              f"min {min(samples) * 1000:7.1f} ms   max {max(samples) * 1000:7.1f} ms")
+    saved = statistics.median(results["eager"]) - statistics.median(results["lazy"])
+    # Differences smaller than the run-to-run spread aren't a result.
+    noise = max(max(s) - min(s) for s in results.values())
+    verdict = "within noise" if abs(saved) < noise else "significant"
+    print(f"time to first /ping saved by lazy init: {saved * 1000:.1f} ms "
+          f"({verdict}; spread {noise * 1000:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,23 @@
 import os
-import uuid
-from datetime import datetime, timedelta, timezone
-from firebase_admin import credentials, firestore, initialize_app
-from services.perplexity import fetch_perplexity_response
-from utils.parser import parse_perplexity_response
-
-# 🔹 Initialize Firebase Admin
-cred = credentials.Certificate("serviceAccountKey.json")
-initialize_app(cred)
-db = firestore.client()
+import sys
+from typing import Optional
+from datetime import datetime, timezone
+
+# Run as `python scripts/fetch_and_upload.py` (render.yaml cron): the repo
+# root isn't on sys.path then.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from perplexity.client import fetch_perplexity_responses  # noqa: E402
+from utils.parser import parse_perplexity_response  # noqa: E402
+from firestore.writer import IngestWriter  # noqa: E402
+from firestore.dedup import filter_new_posts  # noqa: E402
+from firestore.retention import RetentionEngine, expire_at  # noqa: E402
+from utils.platforms import filter_unique_platform_posts  # noqa: E402
+from utils.keywords import extract_keywords  # noqa: E402
+from utils.links import validate_post_links  # noqa: E402
+from utils.scheduler import make_lease  # noqa: E402
+from utils.planner import RefreshPlanner  # noqa: E402
+from utils.firebase import get_db  # noqa: E402
 
 # 🔹 Define refined prompts
 PROMPTS = {
@@ -17,92 +26,114 @@ PROMPTS = {
     "jobs": "Give me 5 latest remote software developer jobs. Mention job title, company name, job type, and a direct apply link."
 }
 
-# 🔥 DELETE old news_articles (older than 2 days)
+# 🔥 DELETE expired news_articles (window: RETENTION_NEWS_ARTICLES_DAYS)
 def delete_old_news_articles():
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(days=2)
-
-    articles_ref = db.collection("news_articles")
-    old_articles = articles_ref.where("timestamp", "<", cutoff).stream()
-
-    deleted_count = 0
-    for doc in old_articles:
-        doc.reference.delete()
-        deleted_count += 1
+    deleted = RetentionEngine().purge(["news_articles"])
+    print(f"🧹 Deleted {deleted['news_articles']} old news articles.")
 
-    print(f"🧹 Deleted {deleted_count} old news articles.")
-
-# 🔥 DELETE old internships and jobs (older than 2 days)
+# 🔥 DELETE expired internships and jobs (window: RETENTION_INTERNSHIPS_JOBS_DAYS)
 def delete_old_internships_jobs():
-    now = datetime.now(timezone.utc)
-    cutoff = now - timedelta(days=2)
-
-    jobs_ref = db.collection("internships_jobs")
-    old_docs = jobs_ref.where("timestamp", "<", cutoff).stream()
-
-    deleted_count = 0
-    for doc in old_docs:
-        doc.reference.delete()
-        deleted_count += 1
-
-    print(f"🧹 Deleted {deleted_count} old internships/jobs.")
+    deleted = RetentionEngine().purge(["internships_jobs"])
+    print(f"🧹 Deleted {deleted['internships_jobs']} old internships/jobs.")
 
 # ⬆️ Upload News
 def upload_news(posts: list):
-    for post in posts:
-        doc_id = str(uuid.uuid4())
-        db.collection("news_articles").document(doc_id).set({
-            "title": post.get("title", ""),
-            "summary": post.get("description", ""),
-            "fullContent": "",
-            "source": "",
-            "url": post.get("link", ""),
-            "timestamp": datetime.now(timezone.utc),
-            "keywords": []
-        })
-    print(f"📥 Uploaded {len(posts)} news articles.")
+    db = get_db()
+    fresh = filter_new_posts(db, "news_articles", posts, key_on_link=False)
+    with IngestWriter(db) as writer:
+        for doc_id, post in fresh:
+            now = datetime.now(timezone.utc)
+            writer.set("news_articles", {
+                "title": post.get("title", ""),
+                "summary": post.get("description", ""),
+                "fullContent": "",
+                "source": "",
+                "url": post.get("link", ""),
+                "timestamp": now,
+                "expireAt": expire_at("news_articles", now),
+                "keywords": extract_keywords(post.get("title", ""), post.get("description", ""))
+            }, doc_id=doc_id)
+    summary = writer.summary()
+    print(f"📥 Uploaded {summary['written']} news articles ({summary['failed']} failed).")
+    return summary
 
 # ⬆️ Upload Internships / Jobs
 def upload_internships_jobs(posts: list, is_job=True):
-    for post in posts:
-        doc_id = str(uuid.uuid4())
-        db.collection("internships_jobs").document(doc_id).set({
-            "title": post.get("title", ""),
-            "company": post.get("company", ""),
-            "location": post.get("location", ""),
-            "type": "Job" if is_job else "Internship",
-            "link": post.get("link", ""),
-            "timestamp": datetime.now(timezone.utc),
-            "keywords": []
-        })
-    print(f"📥 Uploaded {len(posts)} {'jobs' if is_job else 'internships'}.")
+    db = get_db()
+    fresh = filter_new_posts(db, "internships_jobs", posts)
+    with IngestWriter(db) as writer:
+        for doc_id, post in fresh:
+            now = datetime.now(timezone.utc)
+            writer.set("internships_jobs", {
+                "title": post.get("title", ""),
+                "company": post.get("company", ""),
+                "location": post.get("location", ""),
+                "type": "Job" if is_job else "Internship",
+                "link": post.get("link", ""),
+                "timestamp": now,
+                "expireAt": expire_at("internships_jobs", now),
+                "keywords": extract_keywords(
+                    post.get("title", ""), post.get("description"), post.get("company"), post.get("location")
+                )
+            }, doc_id=doc_id)
+    summary = writer.summary()
+    print(f"📥 Uploaded {summary['written']} {'jobs' if is_job else 'internships'} ({summary['failed']} failed).")
+    return summary
+
+# 📡 Fetch + Upload
+def fetch_and_upload_prompts(prompts: dict, planner: Optional[RefreshPlanner] = None):
+    print(f"\n📡 Fetching data for: {', '.join(prompts)}")
+    # Categories are only fetched when due, so always ask for live results.
+    for collection, raw_response in fetch_perplexity_responses(prompts, use_cache=False):
+        if not raw_response:
+            print(f"❌ Failed to fetch data for: {collection}")
+            if planner:
+                planner.record(collection, ok=False)
+            continue
+
+        posts = validate_post_links(parse_perplexity_response(raw_response))
+
+        if collection == "news_articles":
+            summary = upload_news(posts)
+        elif collection == "jobs":
+            summary = upload_internships_jobs(filter_unique_platform_posts(posts), is_job=True)
+        else:
+            summary = upload_internships_jobs(filter_unique_platform_posts(posts), is_job=False)
+        if planner:
+            planner.record(collection, summary["written"])
 
 # 🚀 Main Orchestrator
-def main():
+def main(force: bool = False):
     print("🔁 Starting fetch and upload process...")
 
     # ✅ Auto-delete old documents
     delete_old_news_articles()
     delete_old_internships_jobs()
 
-    for collection, prompt in PROMPTS.items():
-        print(f"\n📡 Fetching data for: {collection}")
-        raw_response = fetch_perplexity_response(prompt)
-
-        if not raw_response:
-            print(f"❌ Failed to fetch data for: {collection}")
-            continue
-
-        posts = parse_perplexity_response(raw_response)
-
-        if collection == "news_articles":
-            upload_news(posts)
-        elif collection == "jobs":
-            upload_internships_jobs(posts, is_job=True)
-        elif collection == "internships":
-            upload_internships_jobs(posts, is_job=False)
+    # 🔒 Share the web scheduler's per-category leases so the two never
+    # refresh the same category at the same time.
+    # 📈 Only categories whose adaptive interval has elapsed (--force: all)
+    planner = RefreshPlanner()
+    due, fresh = planner.plan(PROMPTS, force=force)
+    if fresh:
+        print(f"⏭️ Still fresh: {', '.join(fresh)}")
+
+    leases = {}
+    for collection in due:
+        lease = make_lease(f"fetch_{collection}")
+        if lease.acquire(ttl=600):
+            leases[collection] = lease
+        else:
+            print(f"⏭️ Skipping {collection}: refresh already running elsewhere")
+    prompts = {c: PROMPTS[c] for c in leases}
+
+    try:
+        fetch_and_upload_prompts(prompts, planner)
+    finally:
+        for lease in leases.values():
+            lease.release()
 
     print("✅ Fetch and upload process completed.")
 
 if __name__ == "__main__":
-    main()
+    main(force="--force" in sys.argv[1:])
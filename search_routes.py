@@ -0,0 +1,36 @@
+import time
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from utils.search_index import SEARCH_COLLECTIONS, search_index
+
+router = APIRouter()
+
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+
+
+@router.get("/search")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    type: Optional[str] = Query(None, description="news or jobs (default: both)"),
+    limit: int = Query(SEARCH_PAGE_SIZE, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+):
+    if type and type not in SEARCH_COLLECTIONS:
+        raise HTTPException(status_code=400, detail=f"type must be one of {', '.join(SEARCH_COLLECTIONS)}")
+
+    # The first call (and only the first) loads the index from Firestore.
+    if search_index.loaded_at is None:
+        await run_in_threadpool(search_index.ensure_loaded)
+    else:
+        search_index.ensure_loaded()
+
+    t0 = time.perf_counter()
+    collections = [SEARCH_COLLECTIONS[type]] if type else None
+    items = search_index.search(q, collections, limit)
+    return {
+        "query": q,
+        "items": items,
+        "count": len(items),
+        "took_ms": round((time.perf_counter() - t0) * 1000, 2),
+    }